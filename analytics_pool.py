@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fastf1
+import numpy as np
+
+import profiling
+import race_store
+import telemetry_store
+from career_stats import CAREER_DB, CareerStats
+from race_analytics import prepare_race_data, restore_race_data
+
+FASTF1_CACHE = 'FastF1_cache'
+
+
+def init_worker(cache_dir):
+    fastf1.Cache.enable_cache(cache_dir)
+
+
+def job_result(profile):
+    return {'run_ms': profile.total_ms, 'spans': profile.spans, 'counters': dict(profile.counters)}
+
+
+def prepare_race(race_key, store_dir=race_store.STORE_DIR):
+    # Runs in a worker: FastF1 load and ingest when the race is not stored yet, then every prepared table written
+    # next to it for the caller to read back. The worker's own profile goes back with the result, so its spans
+    # (race.load included) still reach the caller's profile.
+    year, grand_prix, session_type = race_key
+    with profiling.run('prepare_race') as profile:
+        with profiling.span('race_store.get_race'):
+            race_data = race_store.get_race(year, grand_prix, session_type, store_dir)
+
+        # The only place races reach the career tables: storing a race doesn't touch them, and races stored before
+        # they existed are added the first time they are opened
+        if session_type == 'R':
+            career_stats = CareerStats(os.path.join(store_dir, CAREER_DB))
+            if not career_stats.has_race(year, grand_prix):
+                with profiling.span('career_stats.add_race'):
+                    career_stats.add_race_data(race_data, year, grand_prix)
+            career_stats.close()
+
+        with profiling.span('prepare_race_data'):
+            race_data = prepare_race_data(race_data)
+        with profiling.span('race_store.write_prepared'):
+            race_store.write_prepared(race_data, year, grand_prix, session_type, store_dir)
+    return job_result(profile)
+
+
+def ingest_telemetry(race_key, store_dir=race_store.STORE_DIR):
+    # Runs in a worker: loading every car's telemetry is heavier than the race itself
+    with profiling.run('ingest_telemetry') as profile:
+        with profiling.span('telemetry_store.ingest_telemetry'):
+            telemetry_store.ingest_telemetry(*race_key, store_dir)
+    return job_result(profile)
+
+
+class AnalyticsPool:
+    # Bounded process pool for the heavy race work, so one session's cold load doesn't hold the GIL for everyone.
+    # workers=0 runs the same jobs in the calling thread.
+
+    def __init__(self, workers=2, store_dir=race_store.STORE_DIR, cache_dir=FASTF1_CACHE, window=1000):
+        self.workers = workers
+        self.store_dir = store_dir
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._latency = deque(maxlen=window)
+        self._queue_wait = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = None
+        if workers:
+            # A forkserver that has already imported this module: workers start fast and never fork Streamlit's threads
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['analytics_pool'])
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                                                 initargs=(cache_dir,))
+
+    def run(self, func, *args):
+        # func returns its run time and profile (see prepare_race), so the rest of the latency is time spent queued
+        # for a worker; its spans are added to the caller's profile after a span for that wait
+        submitted = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            result = func(*args) if self._executor is None else self._executor.submit(func, *args).result()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        finished = time.perf_counter()
+        latency = finished - submitted
+        run_time = min(result['run_ms'] / 1000, latency)
+        queue_wait = latency - run_time
+        with self._lock:
+            self.completed += 1
+            self._latency.append(latency)
+            self._queue_wait.append(queue_wait)
+
+        if self._executor is not None:
+            wait_span = {'name': 'analytics_pool.queue', 'ms': round(queue_wait * 1000, 3), 'depth': 0, 'start_ms': 0.0}
+            profiling.merge([wait_span], {}, submitted)
+        profiling.merge(result['spans'], result['counters'], finished - run_time)
+        return result
+
+    def load_race(self, race_key):
+        # The prepared tables are read back from the race store; the in-memory lookups (LapIndex, LapMatrix) only wrap
+        # the stored arrays, in the calling thread
+        with profiling.span('race_store.load_prepared'):
+            race_data = race_store.load_prepared(*race_key, self.store_dir)
+        if race_data is None:
+            self.run(prepare_race, race_key, self.store_dir)
+            with profiling.span('race_store.load_prepared'):
+                race_data = race_store.load_prepared(*race_key, self.store_dir)
+        with profiling.span('restore_race_data'):
+            return restore_race_data(race_data)
+
+    def load_telemetry(self, race_key):
+        self.run(ingest_telemetry, race_key, self.store_dir)
+
+    def reset_stats(self):
+        with self._lock:
+            self.max_in_flight = self.in_flight
+            self.completed = 0
+            self.failed = 0
+            self._latency.clear()
+            self._queue_wait.clear()
+
+    def stats(self):
+        with self._lock:
+            latency = np.array(self._latency) * 1000
+            queue_wait = np.array(self._queue_wait) * 1000
+            return {
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - self.workers, 0) if self.workers else 0,
+                'max_in_flight': self.max_in_flight,
+                'completed': self.completed,
+                'failed': self.failed,
+                'latency_p50_ms': float(np.percentile(latency, 50)) if len(latency) else None,
+                'latency_p95_ms': float(np.percentile(latency, 95)) if len(latency) else None,
+                'queue_wait_p95_ms': float(np.percentile(queue_wait, 95)) if len(queue_wait) else None,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
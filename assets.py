@@ -0,0 +1,167 @@
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import profiling
+
+ASSET_CACHE_DIR = 'asset_cache'
+WIKIPEDIA_API_URL = 'https://en.wikipedia.org/w/api.php'
+WIKIPEDIA_REST_URL = 'https://en.wikipedia.org/api/rest_v1'
+RESTCOUNTRIES_URL = 'https://restcountries.com/v3.1'
+
+
+def asset_key(kind, key):
+    return hashlib.sha256(f"{kind}\0{key}".encode('utf-8')).hexdigest()
+
+
+class AssetStore:
+    # Resolves image URLs for drivers, flags and circuits, with a disk cache that also remembers misses
+
+    def __init__(self, cache_dir=ASSET_CACHE_DIR, ttl=7 * 24 * 3600, negative_ttl=3600, error_ttl=60, timeout=5,
+                 max_workers=8, wikipedia_api_url=WIKIPEDIA_API_URL, wikipedia_rest_url=WIKIPEDIA_REST_URL,
+                 restcountries_url=RESTCOUNTRIES_URL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.wikipedia_api_url = wikipedia_api_url
+        self.wikipedia_rest_url = wikipedia_rest_url
+        self.restcountries_url = restcountries_url
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _fresh(self, entry):
+        if entry.get('error'):
+            ttl = self.error_ttl
+        else:
+            ttl = self.ttl if entry['value'] is not None else self.negative_ttl
+        return time.time() - entry['fetched_at'] < ttl
+
+    def lookup(self, kind, key):
+        digest = asset_key(kind, key)
+        with self._lock:
+            entry = self._memory.get(digest)
+        if entry is None:
+            try:
+                with open(self._path(digest)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._memory[digest] = entry
+        return entry if self._fresh(entry) else None
+
+    def _store(self, kind, key, value, error=False):
+        digest = asset_key(kind, key)
+        entry = {'kind': kind, 'key': key, 'value': value, 'fetched_at': time.time(), 'error': error}
+        with self._lock:
+            self._memory[digest] = entry
+
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        return entry
+
+    def get(self, kind, key, fetch):
+        entry = self.lookup(kind, key)
+        profiling.count('asset_cache.hit' if entry is not None else 'asset_cache.miss')
+        if entry is None:
+            error = False
+            try:
+                value = fetch()
+            except requests.RequestException:
+                # Timeouts, dropped connections and server errors say nothing about the asset, so they are only
+                # remembered for error_ttl: long enough that reruns on a flaky network don't wait on it again
+                value, error = None, True
+            except (ValueError, KeyError, IndexError, TypeError):
+                value = None
+            entry = self._store(kind, key, value, error)
+        return entry['value']
+
+    def _get_json(self, url, params=None):
+        with profiling.span('http', url=url):
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    def _fetch_wikipedia_thumbnail(self, title):
+        data = self._get_json(f"{self.wikipedia_rest_url}/page/summary/{quote(title)}")
+        if data is None:
+            return None
+        return data.get('thumbnail', {}).get('source', None)
+
+    def _fetch_flag(self, country):
+        data = self._get_json(f"{self.restcountries_url}/name/{quote(country)}")
+        if not data:
+            return None
+        return data[0]['flags']['png']
+
+    def _fetch_circuit_image(self, meeting_name):
+        data = self._get_json(self.wikipedia_api_url, params={
+            'action': 'query', 'titles': meeting_name, 'prop': 'pageimages', 'format': 'json', 'pithumbsize': 250
+        })
+        if data is None:
+            return None
+        image_url = None
+        for page in data['query']['pages'].values():
+            if 'thumbnail' in page:
+                image_url = page['thumbnail']['source']
+        return image_url
+
+    def driver_headshot(self, full_name, headshot_url=None):
+        if isinstance(headshot_url, str) and headshot_url:
+            return headshot_url.replace('1col', '3col')
+        return self.get('headshot', full_name, lambda: self._fetch_wikipedia_thumbnail(full_name))
+
+    def country_flag(self, country):
+        return self.get('flag', country, lambda: self._fetch_flag(country))
+
+    def circuit_image(self, meeting_name):
+        return self.get('circuit', meeting_name, lambda: self._fetch_circuit_image(meeting_name))
+
+    def prefetch_race(self, race_data):
+        # Resolve every asset the race pages need in parallel, skipping anything already cached
+        meeting = race_data['session_info']['Meeting']
+        jobs = []
+        if self.lookup('flag', meeting['Country']['Name']) is None:
+            jobs.append((self.country_flag, meeting['Country']['Name']))
+        if self.lookup('circuit', meeting['Name']) is None:
+            jobs.append((self.circuit_image, meeting['Name']))
+        for full_name, driver in race_data['drivers'].items():
+            headshot_url = driver.get('HeadshotUrl')
+            if not (isinstance(headshot_url, str) and headshot_url) and self.lookup('headshot', full_name) is None:
+                jobs.append((self.driver_headshot, full_name))
+
+        if not jobs:
+            return 0
+        # Workers run in copies of the caller's context so their requests show up in its profile
+        jobs = [(contextvars.copy_context(), fetch, key) for fetch, key in jobs]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda job: job[0].run(job[1], job[2]), jobs))
+        return len(jobs)
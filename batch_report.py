@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import fastf1
+
+import race_store
+from calendar_index import CALENDAR_SOURCE, load_calendar
+from race_analytics import NEUTRALISED_MASK, prepare_race_data, summary_leaders, weather_summary
+
+REPORT_DIR = 'reports'
+REPORT_VERSION = 5
+FASTF1_CACHE = 'FastF1_cache'
+
+REPORT_FRAMES = ['race_results', 'race_events', 'stints', 'tyre_compounds', 'pit_stops', 'driver_stats']
+
+
+def report_dir(year, grand_prix, out_dir=REPORT_DIR):
+    return os.path.join(out_dir, str(int(year)), str(grand_prix).strip().replace(' ', '_'))
+
+
+def json_value(value):
+    if isinstance(value, dict):
+        return {key: json_value(item) for key, item in value.items()}
+    if isinstance(value, pd.Timedelta):
+        return value.total_seconds()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def is_complete(year, grand_prix, out_dir=REPORT_DIR):
+    try:
+        with open(os.path.join(report_dir(year, grand_prix, out_dir), 'summary.json')) as f:
+            return json.load(f).get('version') == REPORT_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def race_summary(year, grand_prix, race_data):
+    race_results = race_data['race_results']
+    most_successful_team, _, most_places_driver = summary_leaders(race_results)
+    weather = race_data['weather_data']
+
+    return json_value({
+        'version': REPORT_VERSION,
+        'year': int(year),
+        'grand_prix': grand_prix,
+        'name': race_data['session_info']['Meeting'].get('OfficialName', race_data['session_info']['Meeting'].get('Name')),
+        'total_laps': race_data['total_laps'],
+        'winner': race_results['FullName'].iloc[0],
+        'fastest_lap': race_data['race_leaders']['fastest_lap'],
+        'top_speed': race_data['race_leaders']['top_speed'],
+        'most_successful_team': {'TeamName': most_successful_team['TeamName'], 'Points': most_successful_team['Points']},
+        'most_places_gained': {'FullName': most_places_driver['FullName'], 'Positions': most_places_driver['pos_gained']},
+        'weather': weather_summary(weather) if weather is not None else None,
+        'pit_stops': len(race_data['pit_stops']),
+        'neutralised_laps': int(((race_data['lap_status'].to_numpy() & NEUTRALISED_MASK) != 0).sum()),
+    })
+
+
+def write_report(year, grand_prix, out_dir=REPORT_DIR, store_dir=race_store.STORE_DIR):
+    # Runs in a worker process; the bundle is built next to its final place and swapped in, so a killed run leaves no half report
+    race_data = prepare_race_data(race_store.get_race(year, grand_prix, 'R', store_dir))
+    with race_store.atomic_dir(report_dir(year, grand_prix, out_dir)) as tmp_dir:
+        for name in REPORT_FRAMES:
+            frame = race_data[name]
+            if name in ('stints', 'tyre_compounds', 'pit_stops', 'driver_stats'):
+                frame = frame.reset_index()
+            frame.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"), index=False)
+
+        summary = race_summary(year, grand_prix, race_data)
+        with open(os.path.join(tmp_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+    return summary
+
+
+def init_worker(cache_dir, offline):
+    fastf1.Cache.enable_cache(cache_dir)
+    if offline:
+        fastf1.Cache.offline_mode(True)
+
+
+def run_report(year, grand_prix, out_dir, store_dir):
+    start = time.perf_counter()
+    try:
+        write_report(year, grand_prix, out_dir, store_dir)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return year, grand_prix, error, time.perf_counter() - start
+
+
+def write_season_index(year, races, errors, out_dir=REPORT_DIR):
+    # Rebuilt from the bundles on disk, so it is correct whichever run produced them
+    rows = []
+    for grand_prix in races:
+        path = os.path.join(report_dir(year, grand_prix, out_dir), 'summary.json')
+        if is_complete(year, grand_prix, out_dir):
+            with open(path) as f:
+                summary = json.load(f)
+            rows.append({
+                'Year': year,
+                'Grand Prix': grand_prix,
+                'Status': 'ok',
+                'Winner': summary['winner'],
+                'Total Laps': summary['total_laps'],
+                'Fastest Lap Driver': (summary['fastest_lap'] or {}).get('Driver'),
+                'Fastest Lap Time': (summary['fastest_lap'] or {}).get('LapTime'),
+                'Path': os.path.dirname(path),
+                'Error': None,
+            })
+        else:
+            rows.append({'Year': year, 'Grand Prix': grand_prix, 'Status': 'missing' if grand_prix not in errors else 'error',
+                         'Winner': None, 'Total Laps': None, 'Fastest Lap Driver': None, 'Fastest Lap Time': None,
+                         'Path': None, 'Error': errors.get(grand_prix)})
+
+    index = pd.DataFrame(rows)
+    season_dir = os.path.join(out_dir, str(year))
+    os.makedirs(season_dir, exist_ok=True)
+    index.to_parquet(os.path.join(season_dir, 'index.parquet'), index=False)
+    with open(os.path.join(season_dir, 'index.json'), 'w') as f:
+        json.dump(rows, f, indent=2, default=str)
+    return index
+
+
+def season_races(since, until, races=None, calendar_source=CALENDAR_SOURCE):
+    if races:
+        return {year: list(races) for year in range(since, until + 1)}
+    calendar = load_calendar(calendar_source)
+    return {year: calendar[year] for year in range(since, until + 1) if year in calendar}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Write the dashboard's race reports for whole seasons")
+    parser.add_argument('--since', type=int, required=True, help="First season")
+    parser.add_argument('--until', type=int, help="Last season, defaults to --since")
+    parser.add_argument('--races', nargs='+', help="Only these Grands Prix instead of the race.xlsx calendar")
+    parser.add_argument('--calendar', default=CALENDAR_SOURCE)
+    parser.add_argument('--out', default=REPORT_DIR)
+    parser.add_argument('--store', default=race_store.STORE_DIR)
+    parser.add_argument('--cache', default=FASTF1_CACHE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--force', action='store_true', help="Rebuild reports that are already complete")
+    parser.add_argument('--online', dest='offline', action='store_false',
+                        help="Let FastF1 download races that are not in its cache")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    seasons = season_races(args.since, args.until or args.since, args.races, args.calendar)
+
+    pending = [(year, grand_prix) for year, races in seasons.items() for grand_prix in races
+               if args.force or not is_complete(year, grand_prix, args.out)]
+    done = sum(len(races) for races in seasons.values()) - len(pending)
+    print(f"{len(pending)} races to report, {done} already done")
+
+    errors = {}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.cache, args.offline)) as executor:
+        futures = [executor.submit(run_report, year, grand_prix, args.out, args.store) for year, grand_prix in pending]
+        for future in as_completed(futures):
+            year, grand_prix, error, elapsed = future.result()
+            if error is not None:
+                errors.setdefault(year, {})[grand_prix] = error
+                print(f"{year} {grand_prix}: failed after {elapsed:.1f}s ({error})")
+            else:
+                print(f"{year} {grand_prix}: {elapsed:.1f}s")
+
+    for year, races in seasons.items():
+        index = write_season_index(year, races, errors.get(year, {}), args.out)
+        print(f"{year}: {int((index['Status'] == 'ok').sum())}/{len(index)} races in {os.path.join(args.out, str(year))}")
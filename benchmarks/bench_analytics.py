@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+# The section computations are plain functions, so importing the app outside `streamlit run` is enough to drive them
+import main_app
+import race_store
+from bench_lap_schema import fastf1_like_laps
+from lap_schema import normalize_laps
+from race_analytics import driver_rows, prepare_race_data
+
+SAMPLE_RESULTS = os.path.join('Sample Data', 'race_results.csv')
+CACHED_RACE = (2023, 'Australian Grand Prix')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'analytics.json')
+
+
+def sample_race():
+    return {'laps': normalize_laps(fastf1_like_laps()), 'race_results': pd.read_csv(SAMPLE_RESULTS)}
+
+
+def cached_race():
+    import fastf1
+    fastf1.Cache.offline_mode(True)
+    race_data = race_store.session_to_race_data(race_store.load_session(*CACHED_RACE))
+    return {'laps': normalize_laps(race_data['laps']), 'race_results': race_data['race_results']}
+
+
+def season_race(race, races):
+    # The same race run back to back, lap numbers continuing, so every driver has races x the laps
+    laps = race['laps']
+    race_laps = int(laps['LapNumber'].max())
+    copies = []
+    for i in range(races):
+        copy = laps.copy()
+        copy['LapNumber'] = copy['LapNumber'] + i * race_laps
+        copies.append(copy)
+    return {'laps': pd.concat(copies, ignore_index=True), 'race_results': race['race_results']}
+
+
+def section_cases(race, race_data):
+    lap_index = race_data['lap_index']
+    stats = race_data['driver_stats']
+    lap_matrix = race_data['lap_matrix']
+    field = tuple(lap_index.drivers())
+    dri_1, dri_2 = field[:2]
+    pair = (dri_1, dri_2)
+
+    return {
+        'prepare_race_data': lambda: prepare_race_data(dict(race)),
+        'set_race_events': lambda: main_app.race_events_chart(race_data['lap_status']),
+        'lap_time_pit_stop': lambda: main_app.lap_time_tables(
+            lap_index.driver_laps(dri_1), stats.loc[dri_1], driver_rows(race_data['pit_stops'], dri_1)),
+        'tire_dist_sec_time': lambda: main_app.tyre_sector_tables(
+            lap_index.driver_laps(dri_1), stats.loc[dri_1], driver_rows(race_data['stints'], dri_1)),
+        'lap_position': lambda: main_app.position_tables(lap_index.driver_laps(dri_1)),
+        'race_trace': lambda: main_app.race_trace_chart(lap_matrix, 'Gap to leader'),
+        'lap_v_lap': lambda: main_app.lap_v_lap_tables(lap_matrix, pair, pair),
+        'lap_v_lap field': lambda: main_app.lap_v_lap_tables(lap_matrix, field, field),
+        'pos_v_lap_graphs': lambda: main_app.position_comp_tables(lap_matrix, pair, pair),
+        'pos_v_lap_graphs sector': lambda: main_app.sector_comp_tables(lap_matrix, stats, pair, 1),
+        'speed_comp': lambda: main_app.speed_comp_tables(stats, pair, pair),
+        'race_summary': lambda: main_app.summary_leaders(race_data['race_results']),
+    }
+
+
+def measure(func, repeat):
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Measured on a separate call, tracing allocations would skew the timings
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'median_ms': statistics.median(timings) * 1000, 'min_ms': min(timings) * 1000, 'peak_kb': peak / 1024}
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for dataset, cases in results.items():
+        for name, result in cases.items():
+            base = baseline.get(dataset, {}).get(name)
+            if base is None:
+                continue
+            # A 1 ms / 64 KB floor keeps sub-millisecond noise from tripping the check
+            if result['median_ms'] > base['median_ms'] * (1 + tolerance) + 1:
+                found.append(f"{dataset} {name}: {base['median_ms']:.2f} -> {result['median_ms']:.2f} ms")
+            if result['peak_kb'] > base['peak_kb'] * (1 + tolerance) + 64:
+                found.append(f"{dataset} {name}: {base['peak_kb']:.0f} -> {result['peak_kb']:.0f} KB peak")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and peak memory of the dashboard's section computations")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=0, help="also run a season of N copies of the sample race")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown before flagging, 0.5 = 50%%")
+    parser.add_argument('--check', action='store_true', help="exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    races = {'sample': sample_race()}
+    try:
+        races['australia_2023'] = cached_race()
+    except Exception as e:
+        print(f"australia_2023 skipped, FastF1 could not load it offline ({type(e).__name__}: {e})")
+    if args.scale:
+        races[f'season_x{args.scale}'] = season_race(races['sample'], args.scale)
+
+    results = {}
+    for dataset, race in races.items():
+        race_data = prepare_race_data(dict(race))
+        print(f"\n{dataset}: {len(race['laps'])} laps, {len(race_data['lap_index'].drivers())} drivers")
+        print(f"{'computation':<26}{'median ms':>12}{'min ms':>10}{'peak KB':>10}")
+        results[dataset] = {}
+        for name, func in section_cases(race, race_data).items():
+            result = measure(func, args.repeat)
+            results[dataset][name] = result
+            print(f"{name:<26}{result['median_ms']:>12.2f}{result['min_ms']:>10.2f}{result['peak_kb']:>10.0f}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print("\nno baseline yet, run with --save-baseline")
+        return
+
+    with open(args.baseline) as f:
+        found = regressions(results, json.load(f), args.tolerance)
+    print(f"\n{len(found)} regression(s) against {args.baseline}")
+    for line in found:
+        print(f"  {line}")
+    if found and args.check:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import AssetStore
+
+LATENCY = 0.05
+ERROR_TTL = 3
+DRIVERS = [f'Driver {i}' for i in range(20)]
+MISSING_DRIVER = 'Driver 0'
+DROPPED_DRIVER = 'Driver 1'
+
+
+def stub_race():
+    return {
+        'session_info': {'Meeting': {'Name': 'Stub Grand Prix', 'Country': {'Name': 'Stubland'}}},
+        'drivers': {name: {'FullName': name, 'HeadshotUrl': None} for name in DRIVERS},
+    }
+
+
+def start_server():
+    # Stand-ins for the Wikipedia summary, Wikipedia pageimages and REST Countries endpoints AssetStore calls
+    requests_seen = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(LATENCY)
+            url = urlparse(self.path)
+            with lock:
+                requests_seen.append(url.path)
+
+            if url.path.startswith('/rest/page/summary/'):
+                title = unquote(url.path.rsplit('/', 1)[1])
+                if title == DROPPED_DRIVER:
+                    # Hang up without an answer, like a reset connection
+                    self.close_connection = True
+                    return
+                if title == MISSING_DRIVER:
+                    return self.reply(404, {})
+                return self.reply(200, {'thumbnail': {'source': f'http://img/{title}.png'}})
+            if url.path.startswith('/countries/name/'):
+                return self.reply(200, [{'flags': {'png': 'http://img/flag.png'}}])
+            if url.path == '/api.php':
+                title = parse_qs(url.query)['titles'][0]
+                return self.reply(200, {'query': {'pages': {'1': {'thumbnail': {'source': f'http://img/{title}.png'}}}}})
+            self.reply(404, {})
+
+        def reply(self, status, body):
+            body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_seen
+
+
+def asset_store(cache_dir, base_url, workers):
+    return AssetStore(cache_dir=cache_dir, timeout=2, error_ttl=ERROR_TTL, max_workers=workers, wikipedia_api_url=f'{base_url}/api.php',
+                      wikipedia_rest_url=f'{base_url}/rest', restcountries_url=f'{base_url}/countries')
+
+
+def main():
+    server, requests_seen = start_server()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    race = stub_race()
+    failures = []
+
+    for workers in [1, 8]:
+        cache_dir = tempfile.mkdtemp(prefix='bench_assets_')
+        try:
+            store = asset_store(cache_dir, base_url, workers)
+            del requests_seen[:]
+            start = time.perf_counter()
+            fetched = store.prefetch_race(race)
+            cold = time.perf_counter() - start
+            cold_requests = len(requests_seen)
+
+            # A new store on the same directory, as after a restart: nothing goes out again, the dropped lookup
+            # included, until its short error TTL runs out
+            store = asset_store(cache_dir, base_url, workers)
+            del requests_seen[:]
+            start = time.perf_counter()
+            store.prefetch_race(race)
+            for name in DRIVERS:
+                store.driver_headshot(name)
+            warm = time.perf_counter() - start
+            print(f"workers={workers:<3} cold {cold * 1000:7.1f} ms ({fetched} lookups, {cold_requests} requests)   "
+                  f"warm {warm * 1000:6.1f} ms ({len(requests_seen)} requests)")
+
+            if store.lookup('headshot', MISSING_DRIVER) is None:
+                failures.append("a 404 was not negative-cached")
+            if requests_seen:
+                failures.append(f"warm run requested cached assets: {sorted(set(requests_seen))}")
+            if store.driver_headshot(DRIVERS[2]) != f'http://img/{DRIVERS[2]}.png':
+                failures.append("headshot not resolved from the stub")
+            if store.lookup('headshot', DROPPED_DRIVER) is None:
+                failures.append("a dropped connection was retried before its error TTL")
+            time.sleep(ERROR_TTL)
+            if store.lookup('headshot', DROPPED_DRIVER) is not None:
+                failures.append("a dropped connection was kept past its error TTL")
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    server.shutdown()
+    print("checks passed" if not failures else "\n".join(f"FAILED: {failure}" for failure in failures))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
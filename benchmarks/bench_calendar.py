@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import calendar_index
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def cold_load():
+    calendar_index._memo.clear()
+    calendar_index.load_calendar()
+
+
+def main():
+    calendar_index.load_calendar()
+
+    results = {
+        'pd.read_excel (old path)': time_call(lambda: pd.read_excel(calendar_index.CALENDAR_SOURCE), 5),
+        'load_calendar (cold)': time_call(cold_load, 20),
+        'load_calendar (warm)': time_call(calendar_index.load_calendar, 200),
+    }
+    for name, (best, mean) in results.items():
+        print(f"{name:<26} best {best * 1000:10.3f} ms   mean {mean * 1000:10.3f} ms")
+
+    excel_calls = []
+    read_excel = pd.read_excel
+    pd.read_excel = lambda *args, **kwargs: excel_calls.append(args) or read_excel(*args, **kwargs)
+    try:
+        cold_load()
+        calendar_index.load_calendar()
+    finally:
+        pd.read_excel = read_excel
+    print(f"read_excel calls on the selection page path: {len(excel_calls)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.express as px
+
+from bench_lap_schema import fastf1_like_laps
+from bench_telemetry import synthetic_frames
+from charts import line_figure, payload_bytes
+
+
+def time_call(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        timings.append(time.perf_counter() - start)
+    return value, min(timings)
+
+
+def compare(name, frame, x, y):
+    plain, plain_time = time_call(lambda: px.line(frame, x=x, y=y))
+    built, built_time = time_call(lambda: line_figure(frame, x, y))
+    points = sum(len(trace.x) for trace in built.data)
+    kinds = sorted({trace.type for trace in built.data})
+    print(f"{name:<28} px.line {payload_bytes(plain) / 1024:9.1f} KB {plain_time * 1000:7.1f} ms | "
+          f"charts {payload_bytes(built) / 1024:9.1f} KB {built_time * 1000:7.1f} ms "
+          f"({points:,} points, {', '.join(kinds)})")
+
+
+def main():
+    laps = fastf1_like_laps()
+    driver = laps['Driver'].iloc[0]
+    driver_laps = laps[laps['Driver'] == driver]
+    compare(f"lap times ({driver})", driver_laps, 'LapNumber', ['LapTime'])
+    compare(f"sector times ({driver})", driver_laps, 'LapNumber', ['Sector1Time', 'Sector2Time', 'Sector3Time'])
+
+    telemetry = synthetic_frames(driver_laps)[driver]
+    compare(f"whole-race speed ({len(telemetry):,})", telemetry, 'SessionTime', ['Speed'])
+
+
+if __name__ == '__main__':
+    main()
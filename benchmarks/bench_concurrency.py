@@ -0,0 +1,146 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import race_store
+from analytics_pool import AnalyticsPool
+from bench_analytics import sample_race, season_race
+from race_analytics import driver_stats, stint_table
+
+YEAR = 2000
+SESSION_INFO = {'Meeting': {'Name': 'Bench Grand Prix', 'Country': {'Name': 'Nowhere'}}, 'StartDate': '2000-01-01'}
+
+
+def build_store(store_dir, races, scale):
+    # One synthetic race per simulated user, so cold loads never write the same race directory at once
+    race = season_race(sample_race(), scale)
+    keys = []
+    for i in range(races):
+        grand_prix = f'Bench Grand Prix {i}'
+        race_store.ingest_race_data(dict(race, session_info=SESSION_INFO, weather_data=None, circuit_info=None,
+                                         total_laps=int(race['laps']['LapNumber'].max())),
+                                    YEAR, grand_prix, 'R', store_dir)
+        keys.append(race_store.race_key(YEAR, grand_prix, 'R'))
+    return keys
+
+
+def drop_prepared(store_dir, race_key):
+    shutil.rmtree(os.path.join(race_store.race_dir(*race_key, store_dir), race_store.PREPARED_DIR), ignore_errors=True)
+
+
+def concurrent_writes(store_dir, writers=8, rounds=20):
+    # Writers swapping the same directory in at once: every swap must go through, and one whole copy must remain
+    target = os.path.join(store_dir, 'atomic_dir_check')
+    errors = []
+
+    def writer(name):
+        for i in range(rounds):
+            try:
+                with race_store.atomic_dir(target) as tmp_dir:
+                    for part in range(3):
+                        with open(os.path.join(tmp_dir, f'part_{part}'), 'w') as f:
+                            f.write(f'{name} {i}')
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    contents = set()
+    for part in range(3):
+        with open(os.path.join(target, f'part_{part}')) as f:
+            contents.add(f.read())
+    leftovers = [name for name in os.listdir(store_dir) if name.startswith('.atomic_dir_check')]
+    shutil.rmtree(target)
+    failures = errors[:3]
+    if len(contents) != 1:
+        failures.append(f"mixed copies in the target: {sorted(contents)}")
+    if leftovers:
+        failures.append(f"scratch directories left behind: {leftovers}")
+    return failures
+
+
+def user(pool, store_dir, race_key, reruns, cold_every, rerun_ms, cold_ms, start):
+    # A session rerunning its page against a cached race, opening the race from scratch every cold_every reruns
+    race_data = pool.load_race(race_key)
+    start.wait()
+    for i in range(reruns):
+        if i and i % cold_every == 0:
+            drop_prepared(store_dir, race_key)
+            began = time.perf_counter()
+            race_data = pool.load_race(race_key)
+            cold_ms.append((time.perf_counter() - began) * 1000)
+
+        began = time.perf_counter()
+        driver_stats(race_data['lap_index'])
+        stint_table(race_data['lap_index'])
+        rerun_ms.append((time.perf_counter() - began) * 1000)
+
+
+def simulate(pool, store_dir, keys, users, reruns, cold_every):
+    rerun_ms, cold_ms = [], []
+    start = threading.Barrier(users)
+    threads = [threading.Thread(target=user, args=(pool, store_dir, keys[i], reruns, cold_every, rerun_ms, cold_ms, start))
+               for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(rerun_ms), np.array(cold_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p95 rerun latency with one vs many sessions, inline vs process pool")
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--reruns', type=int, default=40)
+    parser.add_argument('--cold-every', type=int, default=10, help="a cold race load every N reruns per user")
+    parser.add_argument('--scale', type=int, default=4, help="races per synthetic race, for a heavier prepare step")
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix='bench_concurrency_')
+    cache_dir = os.path.join(store_dir, 'fastf1_cache')
+    os.makedirs(cache_dir)
+    try:
+        failures = concurrent_writes(store_dir)
+        print("concurrent atomic_dir writers: ok" if not failures else "\n".join(f"FAILED: {f}" for f in failures))
+        if failures:
+            sys.exit(1)
+
+        keys = build_store(store_dir, args.users, args.scale)
+        print(f"{args.users} synthetic races, {args.reruns} reruns per user, a cold load every {args.cold_every}")
+        print(f"{'mode':<10}{'users':>6}{'rerun p50 ms':>14}{'rerun p95 ms':>14}{'cold p95 ms':>13}"
+              f"{'queue p95 ms':>14}{'max in flight':>15}")
+        for mode, workers in [('inline', 0), ('pool', args.workers)]:
+            pool = AnalyticsPool(workers=workers, store_dir=store_dir, cache_dir=cache_dir)
+            try:
+                # Start the workers and write every race's prepared tables before timing anything
+                for key in keys:
+                    drop_prepared(store_dir, key)
+                    pool.load_race(key)
+                for users in sorted({1, args.users}):
+                    pool.reset_stats()
+                    rerun_ms, cold_ms = simulate(pool, store_dir, keys, users, args.reruns, args.cold_every)
+                    stats = pool.stats()
+                    print(f"{mode:<10}{users:>6}{np.percentile(rerun_ms, 50):>14.1f}{np.percentile(rerun_ms, 95):>14.1f}"
+                          f"{np.percentile(cold_ms, 95) if len(cold_ms) else float('nan'):>13.1f}{stats['queue_wait_p95_ms']:>14.1f}"
+                          f"{stats['max_in_flight']:>15}")
+            finally:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
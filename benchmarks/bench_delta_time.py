@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fastf1
+import numpy as np
+import pandas as pd
+
+import telemetry_store
+from bench_telemetry import fastf1_like_laps, synthetic_frames
+from delta_time import GRID_POINTS, delta_time
+
+YEAR = 2023
+GRAND_PRIX = 'Australian Grand Prix'
+DRIVERS = ['VER', 'HAM']
+
+
+def cached_telemetry():
+    index = telemetry_store.telemetry_index(YEAR, GRAND_PRIX)
+    if index is None:
+        fastf1.Cache.enable_cache('FastF1_cache')
+        fastf1.Cache.offline_mode(True)
+        telemetry_store.ingest_telemetry(YEAR, GRAND_PRIX)
+        index = telemetry_store.telemetry_index(YEAR, GRAND_PRIX)
+    return {driver: telemetry_store.driver_telemetry(YEAR, GRAND_PRIX, driver, columns=['Distance', 'Time'], index=index)
+            for driver in DRIVERS}
+
+
+def synthetic_telemetry():
+    laps = fastf1_like_laps()
+    frames = synthetic_frames(laps[laps['Driver'].isin(DRIVERS)])
+    return {driver: (frames[driver], telemetry_store.lap_offsets(frames[driver])) for driver in DRIVERS}
+
+
+def per_lap_delta(telemetry_a, offsets_a, telemetry_b, offsets_b, laps, points=GRID_POINTS):
+    # One lap at a time with a fresh grid per lap, the way a straightforward loop would do it
+    fractions = np.linspace(0.0, 1.0, points)
+    deltas = []
+    for lap in laps:
+        traces = []
+        for telemetry, offsets in [(telemetry_a, offsets_a), (telemetry_b, offsets_b)]:
+            row = offsets[offsets['LapNumber'] == lap].iloc[0]
+            lap_data = telemetry.iloc[row['Start']:row['Stop']]
+            distance = lap_data['Distance'].to_numpy(dtype=float)
+            seconds = lap_data['Time'].dt.total_seconds().to_numpy()
+            traces.append(np.interp(fractions * distance.max(), distance, seconds))
+        deltas.append(traces[1] - traces[0])
+    return np.array(deltas)
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    try:
+        telemetry = cached_telemetry()
+        source = f"{YEAR} {GRAND_PRIX}"
+    except Exception as e:
+        print(f"{YEAR} {GRAND_PRIX} telemetry not available offline ({type(e).__name__}: {e}), using synthetic telemetry")
+        telemetry = synthetic_telemetry()
+        source = 'synthetic telemetry over Sample Data laps'
+
+    (telemetry_a, offsets_a), (telemetry_b, offsets_b) = telemetry[DRIVERS[0]], telemetry[DRIVERS[1]]
+    laps = sorted(set(offsets_a['LapNumber']) & set(offsets_b['LapNumber']))
+    corners = pd.DataFrame({'Number': np.arange(1, 15), 'Letter': '',
+                            'Distance': np.linspace(300, float(telemetry_a['Distance'].max()) - 300, 14)})
+
+    batch = time_call(lambda: delta_time(telemetry_a, offsets_a, telemetry_b, offsets_b, laps, corners), 20)
+    single = time_call(lambda: delta_time(telemetry_a, offsets_a, telemetry_b, offsets_b, laps[:1], corners), 20)
+    loop = time_call(lambda: per_lap_delta(telemetry_a, offsets_a, telemetry_b, offsets_b, laps), 3)
+
+    result = delta_time(telemetry_a, offsets_a, telemetry_b, offsets_b, laps)
+    reference = per_lap_delta(telemetry_a, offsets_a, telemetry_b, offsets_b, laps)
+    print(f"{source}: {DRIVERS[0]} vs {DRIVERS[1]}, {len(laps)} laps, {GRID_POINTS} grid points per lap")
+    print(f"batch, all laps:    {batch * 1000:8.2f} ms")
+    print(f"batch, one lap:     {single * 1000:8.2f} ms")
+    print(f"per-lap loop:       {loop * 1000:8.2f} ms   ({loop / batch:.1f}x slower)")
+    print(f"max difference to the per-lap loop: {np.abs(result['delta'] - reference).max():.2e} s")
+
+
+if __name__ == '__main__':
+    main()
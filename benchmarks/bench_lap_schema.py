@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from lap_schema import TIME_COLUMNS, frame_bytes, normalize_laps
+
+SAMPLE_LAPS = os.path.join('Sample Data', 'laps.csv')
+
+
+def fastf1_like_laps():
+    # The frame the dashboard held before normalization: timedeltas, object strings and float64 numbers
+    laps = pd.read_csv(SAMPLE_LAPS)
+    for col in TIME_COLUMNS:
+        laps[col] = pd.to_timedelta(laps[col])
+    laps['LapStartDate'] = pd.to_datetime(laps['LapStartDate'])
+    for col in ['Driver', 'DriverNumber', 'Team', 'Compound', 'TrackStatus', 'DeletedReason']:
+        laps[col] = laps[col].astype(object).map(lambda value: str(value) if pd.notna(value) else None)
+    return laps
+
+
+def main():
+    laps = fastf1_like_laps()
+
+    start = time.perf_counter()
+    normalized = normalize_laps(laps)
+    elapsed = time.perf_counter() - start
+
+    before = frame_bytes(laps)
+    after = frame_bytes(normalized)
+    print(f"laps shape: {laps.shape[0]} rows x {laps.shape[1]} columns")
+    print(f"bytes per race before: {before:>10,}")
+    print(f"bytes per race after:  {after:>10,}  ({after / before:.1%}, includes TrackStatusMask)")
+    print(f"normalize_laps: {elapsed * 1000:.2f} ms")
+
+    print()
+    print(f"{'column':<20}{'before':>10}{'after':>10}  dtype")
+    before_cols = laps.memory_usage(deep=True, index=False)
+    after_cols = normalized.memory_usage(deep=True, index=False)
+    for col in normalized.columns:
+        print(f"{col:<20}{before_cols.get(col, 0):>10,}{after_cols[col]:>10,}  {normalized[col].dtype}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+# profile_tables is a plain function, so importing the app outside `streamlit run` is enough to check it
+from main_app import profile_tables
+
+CALLS = 200_000
+
+
+def section():
+    return None
+
+
+def per_call_ns(func):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        func()
+    return (time.perf_counter() - start) / CALLS * 1e9
+
+
+def with_span():
+    with profiling.span('section'):
+        pass
+
+
+def main():
+    timed_section = profiling.timed()(section)
+
+    base = per_call_ns(section)
+    print(f"plain call:              {base:8.1f} ns")
+    print(f"timed, profiling off:    {per_call_ns(timed_section):8.1f} ns")
+    print(f"span, profiling off:     {per_call_ns(with_span):8.1f} ns")
+    with profiling.run('bench'):
+        print(f"timed, profiling on:     {per_call_ns(timed_section):8.1f} ns")
+        print(f"span, profiling on:      {per_call_ns(with_span):8.1f} ns")
+    print("a page run makes roughly 60 timed calls and spans, so the cost when off is a few microseconds per rerun")
+
+    # A fragment rerun that opens no span (the replay buttons) must still get a panel
+    with profiling.run('empty') as empty:
+        pass
+    with profiling.run('one span') as profile:
+        with_span()
+    totals, spans = profile_tables(profile)
+    if profile_tables(empty) != (None, None) or list(totals.index) != ['section'] or len(spans) != 1:
+        print("FAILED: profile tables for an empty or a one-span run")
+        sys.exit(1)
+    print("profile tables: empty run and one-span run ok")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fastf1
+
+import race_store
+
+YEAR = 2023
+GRAND_PRIX = 'Australian Grand Prix'
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    fastf1.Cache.enable_cache('FastF1_cache')
+
+    if race_store.load_race(YEAR, GRAND_PRIX) is None:
+        race_store.ingest_race(YEAR, GRAND_PRIX)
+
+    results = {
+        'fastf1 Session.load': time_call(lambda: race_store.load_session(YEAR, GRAND_PRIX), 3),
+        'race_store.load_race': time_call(lambda: race_store.load_race(YEAR, GRAND_PRIX), 50),
+    }
+
+    print(f"{YEAR} {GRAND_PRIX}")
+    for name, (best, mean) in results.items():
+        print(f"{name:<24} best {best * 1000:10.2f} ms   mean {mean * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
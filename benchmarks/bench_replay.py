@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from bench_analytics import sample_race, season_race
+from race_analytics import LapIndex, lap_track_status, pit_stop_table, stint_table, track_status_intervals
+from race_replay import RaceReplay, lap_batches
+
+
+def recompute(laps_so_far):
+    # What the dashboard functions would do if called again on the growing frame every lap
+    lap_index = LapIndex(laps_so_far)
+    stint_table(lap_index)
+    pit_stop_table(lap_index)
+    track_status_intervals(lap_track_status(lap_index.laps))
+
+
+def final_state_mismatches(engine, laps):
+    # After the last lap the replay's tables must be the whole-race ones
+    lap_index = LapIndex(laps)
+    checks = [
+        ('stints', stint_table(lap_index), engine.stint_table()),
+        ('pit stops', pit_stop_table(lap_index), engine.pit_stop_table()),
+        ('race events', track_status_intervals(lap_track_status(lap_index.laps)), engine.race_events()),
+    ]
+    mismatches = []
+    for name, expected, replayed in checks:
+        try:
+            pd.testing.assert_frame_equal(expected, replayed, check_exact=False, rtol=1e-9)
+        except AssertionError as e:
+            mismatches.append(f"{name}: {e}")
+    return mismatches
+
+
+def percentiles(timings):
+    timings = np.array(timings) * 1e6
+    return f"median {np.median(timings):8.0f} us   p95 {np.percentile(timings, 95):8.0f} us   max {timings.max():8.0f} us"
+
+
+def main():
+    race = sample_race()
+    failures = []
+    for name, laps in [('sample race', race['laps']), ('season x24 as one stream', season_race(race, 24)['laps'])]:
+        batches = list(lap_batches(laps))
+        engine = RaceReplay(sorted(laps['Driver'].astype(str).unique()))
+        incremental = []
+        for batch in batches:
+            start = time.perf_counter()
+            engine.push(batch)
+            incremental.append(time.perf_counter() - start)
+
+        print(f"{name}: {len(batches)} laps, {len(engine.drivers)} drivers")
+        print(f"  incremental update:         {percentiles(incremental)}")
+        mismatches = final_state_mismatches(engine, laps)
+        print(f"  final state vs whole-race tables: {'match' if not mismatches else 'MISMATCH'}")
+        failures.extend(f"{name}: {mismatch}" for mismatch in mismatches)
+        if len(batches) <= 100:
+            lap_numbers = laps['LapNumber'].to_numpy(dtype=float, na_value=np.nan)
+            full = []
+            for lap in range(1, len(batches) + 1):
+                start = time.perf_counter()
+                recompute(laps[lap_numbers <= lap])
+                full.append(time.perf_counter() - start)
+            print(f"  recompute on growing frame: {percentiles(full)}")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
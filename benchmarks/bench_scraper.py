@@ -0,0 +1,79 @@
+import html
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from scrape_http import HttpScraper, rows_to_data
+
+LATENCY = 0.1
+FLAKY_YEARS = {1960, 1985, 2010}
+
+
+def fixture_pages():
+    # Results pages rebuilt from race.xlsx, in the same table layout as formula1.com
+    calendar = pd.read_excel('race.xlsx').astype(str)
+    pages = {}
+    for year, races in calendar.groupby('Year'):
+        rows = ''.join(
+            '<tr>' + ''.join(f'<td><p>{html.escape(value)}</p></td>' for value in row) + '</tr>'
+            for row in races[['Grand Prix', 'Date', 'Winner', 'Car', 'Laps', 'Time']].itertuples(index=False)
+        )
+        pages[f'/{year}/races'] = f'<html><body><main id="maincontent"><table><tbody>{rows}</tbody></table></main></body></html>'
+    return pages
+
+
+def start_server(pages):
+    failed_once = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(LATENCY)
+            year = int(self.path.split('/')[1])
+            with lock:
+                flaky = year in FLAKY_YEARS and self.path not in failed_once
+                failed_once.add(self.path)
+            if flaky or self.path not in pages:
+                self.send_response(503 if flaky else 404)
+                self.end_headers()
+                return
+            body = pages[self.path].encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    pages = fixture_pages()
+    server = start_server(pages)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    years = range(1950, 2024)
+
+    for workers in [1, 16, 32]:
+        scraper = HttpScraper(base_url=base_url, workers=workers, retries=3, backoff=0.05)
+        start = time.perf_counter()
+        rows_by_year, errors = scraper.scrape('races', years)
+        elapsed = time.perf_counter() - start
+        rows = len(rows_to_data('races', rows_by_year)['Year'])
+        print(f"workers={workers:<3} {elapsed:7.2f} s   {len(rows_by_year)} years   {rows} rows   {len(errors)} errors")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import telemetry_store
+from bench_lap_schema import fastf1_like_laps
+
+YEAR = 2023
+GRAND_PRIX = 'Sample Grand Prix'
+SAMPLE_RATE = 0.27
+
+
+def synthetic_telemetry(driver_laps, seed=0):
+    # Car data at roughly the live-timing rate over the sample lap timings, with a speed profile that repeats every lap
+    rng = np.random.default_rng(seed)
+    session_start = driver_laps['LapStartTime'].min().total_seconds()
+    session_end = driver_laps['Time'].max().total_seconds()
+    seconds = np.arange(session_start, session_end, SAMPLE_RATE)
+    phase = (seconds - session_start) / 90.0 * 2 * np.pi
+
+    speed = 220 + 90 * np.sin(phase * 7) + rng.normal(0, 3, len(seconds))
+    throttle = np.clip(50 + 60 * np.sin(phase * 7), 0, 100)
+    return pd.DataFrame({
+        'SessionTime': pd.to_timedelta(seconds, unit='s'),
+        'Speed': np.clip(speed, 60, 340),
+        'RPM': 9000 + 30 * speed,
+        'nGear': np.clip(speed // 45, 1, 8),
+        'Throttle': throttle,
+        'Brake': throttle < 5,
+        'DRS': np.where(speed > 300, 12, 0),
+        'X': 1000 * np.cos(phase),
+        'Y': 1000 * np.sin(phase),
+        'Z': np.zeros(len(seconds)),
+    })
+
+
+def synthetic_frames(laps):
+    frames = {}
+    for i, (driver, driver_laps) in enumerate(laps.groupby('Driver')):
+        frames[driver] = telemetry_store.lap_telemetry_frame(synthetic_telemetry(driver_laps, i), driver_laps)
+    return frames
+
+
+def resident_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def main():
+    laps = fastf1_like_laps()
+    frames = synthetic_frames(laps)
+    rows = sum(len(frame) for frame in frames.values())
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        start = time.perf_counter()
+        target = telemetry_store.write_telemetry(frames, telemetry_store.telemetry_dir(YEAR, GRAND_PRIX, 'R', store_dir))
+        write_time = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(target, name)) for name in os.listdir(target))
+        del frames
+
+        print(f"{rows:,} samples for {laps['Driver'].nunique()} drivers, {size / 1e6:.1f} MB on disk, written in {write_time:.2f}s")
+
+        start = time.perf_counter()
+        index = telemetry_store.telemetry_index(YEAR, GRAND_PRIX, 'R', store_dir)
+        print(f"index: {len(index)} laps, read in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        pairs = list(zip(index['Driver'], index['LapNumber']))
+        random.Random(0).shuffle(pairs)
+
+        rss_before = resident_kb()
+        timings = []
+        for driver, lap in pairs[:100]:
+            start = time.perf_counter()
+            trace = telemetry_store.lap_telemetry(YEAR, GRAND_PRIX, driver, lap, 'R', store_dir, index=index)
+            timings.append(time.perf_counter() - start)
+        rss_after = resident_kb()
+        print(f"one lap trace ({len(trace)} rows): median {statistics.median(timings) * 1000:.2f} ms, "
+              f"max {max(timings) * 1000:.2f} ms over {len(timings)} laps")
+        print(f"resident memory after 100 lap reads: +{rss_after - rss_before:,} KB")
+
+        driver = index['Driver'].iloc[0]
+        start = time.perf_counter()
+        frame, offsets = telemetry_store.driver_telemetry(YEAR, GRAND_PRIX, driver, 'R', store_dir, index=index)
+        print(f"all laps of {driver} ({len(frame):,} rows, {len(offsets)} laps): "
+              f"{(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from time_format import format_lap_times
+
+SAMPLE_LAPS = os.path.join('Sample Data', 'laps.csv')
+TIME_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'PitInTime', 'PitOutTime']
+
+
+def convert_to_time_format(seconds):
+    # The per-element formatter the dashboard used before
+    if pd.isna(seconds):
+        return "N/A"
+    minutes = int(seconds // 60)
+    secs = seconds % 60
+    return f"{minutes}:{secs:.4f}"
+
+
+def per_element(laps):
+    return {col: laps[col].apply(lambda x: convert_to_time_format(x.total_seconds())) for col in TIME_COLUMNS}
+
+
+def vectorized(laps):
+    return {col: format_lap_times(laps[col]) for col in TIME_COLUMNS}
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    laps = pd.read_csv(SAMPLE_LAPS, usecols=TIME_COLUMNS)
+    for col in TIME_COLUMNS:
+        laps[col] = pd.to_timedelta(laps[col])
+    cells = laps.size
+
+    old = time_call(lambda: per_element(laps), 10)
+    new = time_call(lambda: vectorized(laps), 10)
+    print(f"{cells} cells from {SAMPLE_LAPS}")
+    print(f"per-element apply   {old * 1000:8.2f} ms")
+    print(f"format_lap_times    {new * 1000:8.2f} ms   ({old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_analytics import sample_race, season_race
+from race_analytics import FUEL_EFFECT, MIN_FIT_LAPS, LapIndex, degradation_laps, stint_table
+
+
+def per_stint_fits(lap_index):
+    # One np.polyfit per stint, the way a straightforward loop would do it
+    laps = lap_index.laps
+    usable = degradation_laps(laps)
+    lap_numbers = laps['LapNumber'].to_numpy(dtype=float, na_value=np.nan)
+    corrected = laps['LapTime'].dt.total_seconds().to_numpy() - FUEL_EFFECT * (np.nanmax(lap_numbers) - lap_numbers)
+    tyre_life = laps['TyreLife'].to_numpy(dtype=float)
+
+    # Same stint boundaries as stint_table: a new driver, Stint number or compound
+    changed = ((laps['Driver'] != laps['Driver'].shift()) | (laps['Stint'] != laps['Stint'].shift()).fillna(True) |
+               (laps['Compound'] != laps['Compound'].shift()))
+    fits = []
+    for _, stint in laps.groupby(changed.cumsum().to_numpy()):
+        rows = stint.index.to_numpy()
+        rows = rows[usable[rows]]
+        if len(rows) < MIN_FIT_LAPS or np.ptp(tyre_life[rows]) == 0:
+            fits.append((np.nan, np.nan))
+            continue
+        deg_rate, base_pace = np.polyfit(tyre_life[rows], corrected[rows], 1)
+        fits.append((deg_rate, base_pace))
+    return np.array(fits)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    race = sample_race()
+    for name, laps in [('sample race', race['laps']), ('season x24', season_race(race, 24)['laps'])]:
+        lap_index = LapIndex(laps)
+        stints = stint_table(lap_index)
+        batch = best_of(lambda: stint_table(lap_index), 5)
+        loop = best_of(lambda: per_stint_fits(lap_index), 2)
+
+        reference = per_stint_fits(lap_index)
+        fitted = stints['DegRate'].notna().to_numpy()
+        same_stints = len(reference) == len(stints)
+        print(f"{name}: {len(laps):,} laps, {len(stints):,} stints, {int(fitted.sum()):,} fitted")
+        print(f"  stint_table with batched fits: {batch * 1000:8.2f} ms")
+        print(f"  polyfit per stint:             {loop * 1000:8.2f} ms   ({loop / batch:.1f}x slower)")
+        if same_stints:
+            print(f"  max deg rate difference: {np.nanmax(np.abs(stints['DegRate'].to_numpy() - reference[:, 0])):.2e} s/lap")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+import race_store
+
+CALENDAR_SOURCE = 'race.xlsx'
+CALENDAR_FILE = 'calendar.arrow'
+CALENDAR_META = 'calendar.json'
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_calendar(source=CALENDAR_SOURCE, store_dir=race_store.STORE_DIR):
+    excel_data = pd.read_excel(source)
+    calendar = excel_data[['Year', 'Grand Prix']].drop_duplicates().reset_index(drop=True)
+    calendar['Year'] = calendar['Year'].astype('int16')
+
+    os.makedirs(store_dir, exist_ok=True)
+    race_store.write_frame(calendar, os.path.join(store_dir, CALENDAR_FILE))
+    return calendar
+
+
+def _read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, CALENDAR_META)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(store_dir, meta):
+    with open(os.path.join(store_dir, CALENDAR_META), 'w') as f:
+        json.dump(meta, f)
+
+
+def calendar_frame(source=CALENDAR_SOURCE, store_dir=race_store.STORE_DIR):
+    # Rebuild only when race.xlsx changed: mtime/size first, the content hash only when those moved
+    stat = os.stat(source)
+    meta = _read_meta(store_dir)
+    calendar_path = os.path.join(store_dir, CALENDAR_FILE)
+
+    if meta is not None and os.path.isfile(calendar_path):
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return race_store.read_frame(calendar_path)
+        sha256 = file_sha256(source)
+        if meta['sha256'] == sha256:
+            _write_meta(store_dir, {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256})
+            return race_store.read_frame(calendar_path)
+    else:
+        sha256 = file_sha256(source)
+
+    calendar = build_calendar(source, store_dir)
+    _write_meta(store_dir, {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256})
+    return calendar
+
+
+def load_calendar(source=CALENDAR_SOURCE, store_dir=race_store.STORE_DIR):
+    stat = os.stat(source)
+    memo_key = (os.path.abspath(source), os.path.abspath(store_dir), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        calendar = _memo.get(memo_key)
+    if calendar is not None:
+        return calendar
+
+    frame = calendar_frame(source, store_dir)
+    calendar = {}
+    for year, grand_prix in zip(frame['Year'].tolist(), frame['Grand Prix'].tolist()):
+        calendar.setdefault(int(year), []).append(grand_prix)
+
+    with _lock:
+        _memo.clear()
+        _memo[memo_key] = calendar
+    return calendar
+
+
+def calendar_years(calendar):
+    return sorted(calendar, reverse=True)
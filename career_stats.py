@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+CAREER_DB = 'career.sqlite'
+
+TOTALS = ['races', 'points', 'wins', 'podiums', 'dnfs', 'places_gained', 'fastest_laps']
+
+
+def totals_sql(key):
+    # A team has two entries per race, so it counts races rather than rows
+    races = 'COUNT(*)' if key == 'driver' else 'COUNT(DISTINCT grand_prix)'
+    return f'{races}, SUM(points), SUM(position = 1), SUM(position <= 3), SUM(dnf), SUM(places_gained), SUM(fastest_lap)'
+
+
+def race_date(session_info):
+    return str(pd.Timestamp(session_info['StartDate']))
+
+
+def is_dnf(status):
+    status = str(status).strip()
+    return not (status.lower() == 'finished' or status.endswith('Lap') or status.endswith('Laps'))
+
+
+def fastest_lap_driver(laps):
+    lap_times = laps['LapTime']
+    if not lap_times.notna().any():
+        return None
+    return laps.at[lap_times.idxmin(), 'Driver']
+
+
+def race_entries(race_results, fastest_driver=None):
+    entries = []
+    for _, row in race_results.iterrows():
+        position = int(row['Position']) if pd.notna(row['Position']) else None
+        grid = int(row['GridPosition']) if pd.notna(row['GridPosition']) else None
+        entries.append((
+            row['FullName'],
+            row['Abbreviation'],
+            row['TeamName'],
+            float(row['Points']) if pd.notna(row['Points']) else 0.0,
+            position,
+            grid,
+            int(is_dnf(row['Status'])),
+            grid - position if grid is not None and position is not None else 0,
+            int(row['Abbreviation'] == fastest_driver),
+        ))
+    return entries
+
+
+class CareerStats:
+    # Per-race result rows plus per-season totals by driver and by team; adding a race only re-totals that season's rows
+
+    def __init__(self, path=CAREER_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        totals = ', '.join(f"{column} {'REAL' if column == 'points' else 'INTEGER'} NOT NULL" for column in TOTALS)
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS race_entries '
+                '(year INTEGER NOT NULL, grand_prix TEXT NOT NULL, race_date TEXT NOT NULL, driver TEXT NOT NULL, '
+                'abbreviation TEXT, team TEXT, points REAL NOT NULL, position INTEGER, grid INTEGER, '
+                'dnf INTEGER NOT NULL, places_gained INTEGER NOT NULL, fastest_lap INTEGER NOT NULL, '
+                'PRIMARY KEY (year, grand_prix, driver))'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS race_entries_driver ON race_entries (driver, year, race_date)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS race_entries_team ON race_entries (team, year)')
+            for table, key in [('driver_seasons', 'driver'), ('team_seasons', 'team')]:
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    f'({key} TEXT NOT NULL, year INTEGER NOT NULL, {totals}, PRIMARY KEY ({key}, year))'
+                )
+
+    def has_race(self, year, grand_prix):
+        with self._lock:
+            cursor = self.conn.execute(
+                'SELECT 1 FROM race_entries WHERE year = ? AND grand_prix = ? LIMIT 1', (int(year), grand_prix)
+            )
+            return cursor.fetchone() is not None
+
+    def add_race(self, year, grand_prix, date, entries):
+        year = int(year)
+        with self._lock, self.conn:
+            previous = self.conn.execute(
+                'SELECT driver, team FROM race_entries WHERE year = ? AND grand_prix = ?', (year, grand_prix)
+            ).fetchall()
+            self.conn.execute('DELETE FROM race_entries WHERE year = ? AND grand_prix = ?', (year, grand_prix))
+            self.conn.executemany(
+                'INSERT INTO race_entries (year, grand_prix, race_date, driver, abbreviation, team, points, position, '
+                'grid, dnf, places_gained, fastest_lap) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(year, grand_prix, date, *entry) for entry in entries]
+            )
+
+            drivers = {entry[0] for entry in entries} | {driver for driver, _ in previous}
+            teams = {entry[2] for entry in entries} | {team for _, team in previous}
+            self._retotal('driver_seasons', 'driver', year, drivers)
+            self._retotal('team_seasons', 'team', year, teams)
+
+    def _retotal(self, table, key, year, names):
+        names = sorted(name for name in names if name is not None)
+        if not names:
+            return
+        placeholders = ', '.join('?' for _ in names)
+        self.conn.execute(f'DELETE FROM {table} WHERE year = ? AND {key} IN ({placeholders})', (year, *names))
+        self.conn.execute(
+            f'INSERT INTO {table} ({key}, year, {", ".join(TOTALS)}) '
+            f'SELECT {key}, year, {totals_sql(key)} FROM race_entries '
+            f'WHERE year = ? AND {key} IN ({placeholders}) GROUP BY {key}, year',
+            (year, *names)
+        )
+
+    def add_race_data(self, race_data, year, grand_prix):
+        laps = race_data.get('laps')
+        fastest_driver = fastest_lap_driver(laps) if laps is not None else None
+        self.add_race(year, grand_prix, race_date(race_data['session_info']),
+                      race_entries(race_data['race_results'], fastest_driver))
+
+    def _profile(self, table, key, name, year, date):
+        # Earlier seasons come from the materialized totals, the current one is summed up to this race
+        with self._lock:
+            season = self.conn.execute(
+                f'SELECT {totals_sql(key)} FROM race_entries WHERE {key} = ? AND year = ? AND race_date <= ?',
+                (name, int(year), date)
+            ).fetchone()
+            earlier = self.conn.execute(
+                f'SELECT {", ".join(f"SUM({column})" for column in TOTALS)} FROM {table} WHERE {key} = ? AND year < ?',
+                (name, int(year))
+            ).fetchone()
+
+        season = {column: value or 0 for column, value in zip(TOTALS, season)}
+        career = {column: (value or 0) + season[column] for column, value in zip(TOTALS, earlier)}
+        return {'season': season, 'career': career}
+
+    def driver_profile(self, driver, year, date):
+        return self._profile('driver_seasons', 'driver', driver, year, date)
+
+    def team_profile(self, team, year, date):
+        return self._profile('team_seasons', 'team', team, year, date)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    import race_store
+
+    # Backfill from races that were stored before the aggregates existed
+    store_dir = sys.argv[1] if len(sys.argv) > 1 else race_store.STORE_DIR
+    stats = CareerStats(os.path.join(store_dir, CAREER_DB))
+    added = 0
+    for year in sorted(os.listdir(store_dir)):
+        year_dir = os.path.join(store_dir, year)
+        if not year.isdigit() or not os.path.isdir(year_dir):
+            continue
+        for name in sorted(os.listdir(year_dir)):
+            meta_path = os.path.join(year_dir, name, 'meta.json')
+            if not name.endswith('_R') or not os.path.isfile(meta_path):
+                continue
+            with open(meta_path) as f:
+                meta = json.load(f)
+            race_data = race_store.load_race(meta['year'], meta['grand_prix'], 'R', store_dir)
+            if race_data is not None:
+                stats.add_race_data(race_data, meta['year'], meta['grand_prix'])
+                added += 1
+    print(f"{added} races in {stats.path}")
+    stats.close()
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from time_format import to_seconds
+
+POINT_BUDGET = int(os.environ.get('F1_CHART_POINTS', 2000))
+WEBGL_THRESHOLD = int(os.environ.get('F1_WEBGL_THRESHOLD', 1000))
+
+
+def numeric_values(values):
+    # Timedeltas go to the browser as float seconds instead of ISO strings
+    return to_seconds(values).astype(np.float64)
+
+
+def lttb(x, y, budget):
+    # Largest-Triangle-Three-Buckets: indices of the points that keep the shape of the line
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(budget - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def line_trace(x, y, name=None, budget=None, webgl_threshold=None, **kwargs):
+    budget = POINT_BUDGET if budget is None else budget
+    webgl_threshold = WEBGL_THRESHOLD if webgl_threshold is None else webgl_threshold
+
+    x = numeric_values(x)
+    y = numeric_values(y)
+    if len(x) > budget:
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        keep = lttb(x, y, budget)
+        x, y = x[keep], y[keep]
+
+    trace = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+    return trace(x=x, y=y, name=name, mode='lines', **kwargs)
+
+
+def line_figure(frame, x, y, names=None, x_title=None, y_title=None, reverse_y=False, budget=None,
+                webgl_threshold=None):
+    # The px.line replacement for the dashboard: one trace per column of y
+    names = names or {}
+    fig = go.Figure([
+        line_trace(frame[x], frame[col], names.get(col, col), budget, webgl_threshold) for col in y
+    ])
+    fig.update_layout(xaxis_title=x_title or x, yaxis_title=y_title, showlegend=len(y) > 1)
+    if reverse_y:
+        fig.update_yaxes(autorange='reversed')
+    return fig
+
+
+def payload_bytes(value):
+    # JSON bytes of every figure in a section's computed value
+    if isinstance(value, go.Figure):
+        return len(pio.to_json(value, validate=False))
+    if isinstance(value, (tuple, list)):
+        return sum(payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_bytes(item) for item in value.values())
+    return 0
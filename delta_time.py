@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+GRID_POINTS = 500
+
+
+def lap_rows(offsets, laps):
+    # Row positions of the requested laps in a driver's telemetry, and which requested lap each row belongs to
+    offsets = offsets.set_index('LapNumber').loc[laps]
+    starts = offsets['Start'].to_numpy(dtype=np.int64)
+    lengths = offsets['Stop'].to_numpy(dtype=np.int64) - starts
+    lap_pos = np.repeat(np.arange(len(laps)), lengths)
+    rows = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+    return rows, lap_pos, lengths
+
+
+def lap_times_on_grid(telemetry, offsets, laps, fractions):
+    # One np.interp call for every lap: keys are 2 * lap + fraction of the lap, so laps never interpolate into each other
+    rows, lap_pos, lengths = lap_rows(offsets, laps)
+    distance = telemetry['Distance'].to_numpy(dtype=np.float64)[rows]
+    seconds = pd.to_timedelta(telemetry['Time']).to_numpy(dtype='timedelta64[ns]')[rows].astype(np.int64) / 1e9
+
+    starts = np.cumsum(lengths) - lengths
+    lap_length = np.maximum.reduceat(distance, starts)
+    keys = 2.0 * lap_pos + distance / np.where(lap_length > 0, lap_length, 1.0)[lap_pos]
+
+    queries = (2.0 * np.arange(len(laps))[:, None] + fractions[None, :]).ravel()
+    return np.interp(queries, keys, seconds).reshape(len(laps), len(fractions)), lap_length
+
+
+def corner_boundaries(corners, lap_length):
+    # Each corner owns the track from the midpoint with the previous corner to the midpoint with the next one
+    distance = np.sort(corners['Distance'].to_numpy(dtype=np.float64))
+    middles = (distance[1:] + distance[:-1]) / 2
+    return np.clip(np.r_[0.0, middles, lap_length] / lap_length, 0.0, 1.0)
+
+
+def values_at(trace, fractions, grid_fractions):
+    # Linear interpolation of every row of a (laps x grid) array at the same fractions
+    position = fractions * (len(grid_fractions) - 1)
+    low = np.clip(np.floor(position).astype(np.int64), 0, len(grid_fractions) - 2)
+    weight = position - low
+    return trace[:, low] * (1 - weight) + trace[:, low + 1] * weight
+
+
+def delta_time(telemetry_a, offsets_a, telemetry_b, offsets_b, laps=None, corners=None, points=GRID_POINTS):
+    # Positive delta means driver b is behind driver a at that point of the lap
+    if laps is None:
+        laps = sorted(set(offsets_a['LapNumber']) & set(offsets_b['LapNumber']))
+    laps = list(laps)
+    fractions = np.linspace(0.0, 1.0, points)
+
+    times_a, length_a = lap_times_on_grid(telemetry_a, offsets_a, laps, fractions)
+    times_b, _ = lap_times_on_grid(telemetry_b, offsets_b, laps, fractions)
+    delta = times_b - times_a
+
+    lap_length = float(np.median(length_a)) if len(laps) else 0.0
+    result = {
+        'laps': np.asarray(laps),
+        'distance': fractions * lap_length,
+        'delta': delta,
+        'corner_delta': None,
+        'corner_distance': None,
+    }
+
+    if corners is not None and len(corners) and len(laps):
+        boundaries = corner_boundaries(corners, lap_length)
+        at_boundaries = values_at(delta, boundaries, fractions)
+        labels = [f"{int(number)}{letter if isinstance(letter, str) else ''}" for number, letter in
+                  corners.sort_values('Distance')[['Number', 'Letter']].itertuples(index=False)]
+        result['corner_delta'] = pd.DataFrame(np.diff(at_boundaries, axis=1), index=pd.Index(laps, name='LapNumber'),
+                                              columns=labels)
+        result['corner_distance'] = np.sort(corners['Distance'].to_numpy(dtype=np.float64))
+
+    return result
@@ -1,83 +1,138 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
-
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-driver = webdriver.Chrome(options=chrome_options)
-wait = WebDriverWait(driver, 10)
-
-
-def race_results():
-    data = {
-        'Year': [],
-        'Grand Prix': [],
-        'Date': [],
-        'Winner': [],
-        'Car': [],
-        'Laps': [],
-        'Time': []
-    }
-
-    for i in range(1950, 2024):
-        print("Year: " + str(i))
-        driver.get(f'https://www.formula1.com/en/results/{i}/races')
-        try:
-            table = wait.until(EC.presence_of_element_located((By.XPATH, '//*[@id="maincontent"]/div/div[2]/div/div[2]/div[2]/div/div[2]/table/tbody')))
-            rows = table.find_elements(By.TAG_NAME, 'tr')
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, 'td')
-                data['Year'].append(i)
-                data['Grand Prix'].append(cols[0].get_attribute('textContent').strip())
-                data['Date'].append(cols[1].get_attribute('textContent').strip())
-                data['Winner'].append(cols[2].get_attribute('textContent').strip())
-                data['Car'].append(cols[3].get_attribute('textContent').strip())
-                data['Laps'].append(cols[4].get_attribute('textContent').strip())
-                data['Time'].append(cols[5].get_attribute('textContent').strip())
-            
-            print("Data Extracted")
-        except:
-            print("Error")
-    
-    return data
-
-def driver_results():
-    data = {
-        'Year': [],
-        'Pos': [],
-        'Driver': [],
-        'Nationality': [],
-        'Car': [],
-        'Pts': []
-    }
-
-    for i in range(1950, 2024):
-        print("Year: " + str(i))
-        driver.get(f'https://www.formula1.com/en/results/{i}/drivers')
+import argparse
+import datetime
+import json
+
+from scrape_http import PAGE_COLUMNS, RESULTS_URL, HttpScraper, rows_to_data
+from scrape_store import SCRAPE_STORE_PATH, ScrapeStore
+
+TABLE_XPATH = '//*[@id="maincontent"]/div/div[2]/div/div[2]/div[2]/div/div[2]/table/tbody'
+
+
+def start_driver():
+    # Selenium is only needed for the fallback path, so it is imported and Chrome started only when that runs
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    return webdriver.Chrome(options=chrome_options)
+
+
+def selenium_results(kind, years, base_url=RESULTS_URL, on_result=None):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    driver = start_driver()
+    wait = WebDriverWait(driver, 10)
+    columns = PAGE_COLUMNS[kind]
+    rows_by_year = {}
+    errors = []
+
+    try:
+        for i in years:
+            print("Year: " + str(i))
+            url = f'{base_url}/{i}/{kind}'
+            try:
+                driver.get(url)
+                table = wait.until(EC.presence_of_element_located((By.XPATH, TABLE_XPATH)))
+                rows = table.find_elements(By.TAG_NAME, 'tr')
+                rows_by_year[i] = []
+                for row in rows:
+                    cols = row.find_elements(By.TAG_NAME, 'td')
+                    rows_by_year[i].append([col.get_attribute('textContent').strip() for col in cols[:len(columns)]])
+                if on_result is not None:
+                    on_result(i, rows_by_year[i])
+
+                print("Data Extracted")
+            except Exception as e:
+                print("Error")
+                errors.append({'year': i, 'kind': kind, 'url': url, 'attempts': 1, 'error': f"{type(e).__name__}: {e}"})
+    finally:
+        driver.quit()
+
+    return rows_by_year, errors
+
+
+def scrape(kind, years, backend='http', workers=16, retries=3, selenium_fallback=True, base_url=RESULTS_URL,
+           on_result=None):
+    if backend == 'selenium':
+        return selenium_results(kind, years, base_url, on_result)
+
+    scraper = HttpScraper(base_url=base_url, workers=workers, retries=retries)
+    rows_by_year, errors = scraper.scrape(kind, years, on_result)
+    if errors and selenium_fallback:
+        retry_years = [error['year'] for error in errors]
         try:
-            table = wait.until(EC.presence_of_element_located((By.XPATH, '//*[@id="maincontent"]/div/div[2]/div/div[2]/div[2]/div/div[2]/table/tbody')))
-            rows = table.find_elements(By.TAG_NAME, 'tr')
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, 'td')
-                data['Year'].append(i)
-                data['Pos'].append(cols[0].get_attribute('textContent').strip())
-                data['Driver'].append(cols[1].get_attribute('textContent').strip())
-                data['Nationality'].append(cols[2].get_attribute('textContent').strip())
-                data['Car'].append(cols[3].get_attribute('textContent').strip())
-                data['Pts'].append(cols[4].get_attribute('textContent').strip())
-            
-            print("Data Extracted")
-        except:
-            print("Error")
-    
-    return data
-
-
-
-data = race_results()
-
-df = pd.DataFrame(data)
-df.to_excel('race.xlsx', index=False, sheet_name='race')
+            fallback_rows, fallback_errors = selenium_results(kind, retry_years, base_url, on_result)
+        except Exception as e:
+            # No selenium, no chromedriver or a browser that won't start: keep the HTTP errors and say why
+            print(f"Selenium fallback failed ({type(e).__name__}), keeping the HTTP errors")
+            errors.append({'years': retry_years, 'kind': kind, 'fallback': 'selenium',
+                           'error': f"{type(e).__name__}: {e}"})
+        else:
+            rows_by_year.update(fallback_rows)
+            errors = fallback_errors
+    return rows_by_year, errors
+
+
+def race_results(years=range(1950, 2024), **kwargs):
+    rows_by_year, errors = scrape('races', years, **kwargs)
+    return rows_to_data('races', rows_by_year), errors
+
+
+def driver_results(years=range(1950, 2024), **kwargs):
+    rows_by_year, errors = scrape('drivers', years, **kwargs)
+    return rows_to_data('drivers', rows_by_year), errors
+
+
+def parse_args():
+    current_season = datetime.date.today().year
+    parser = argparse.ArgumentParser(description="Scrape formula1.com results into the local scrape store")
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http')
+    parser.add_argument('--since', type=int, default=1950, help="First season to consider")
+    parser.add_argument('--until', type=int, default=current_season, help="Last season to consider")
+    parser.add_argument('--years', type=int, nargs='+', help="Re-scrape exactly these seasons")
+    parser.add_argument('--kinds', nargs='+', choices=list(PAGE_COLUMNS), default=list(PAGE_COLUMNS))
+    parser.add_argument('--max-age', type=float, default=24, help="Hours before the current season is stale")
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--no-selenium-fallback', dest='selenium_fallback', action='store_false')
+    parser.add_argument('--base-url', default=RESULTS_URL)
+    parser.add_argument('--store', default=SCRAPE_STORE_PATH)
+    parser.add_argument('--export-xlsx', metavar='PATH', help="Also export the races table, e.g. race.xlsx")
+    parser.add_argument('--errors', default='scrape_errors.json', help="Where to write the error report")
+    # The season still being raced is refreshed after --max-age; --until only ends the range
+    parser.set_defaults(current_season=current_season)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    store = ScrapeStore(args.store)
+    report = []
+
+    for kind in args.kinds:
+        if args.years:
+            years = sorted(args.years)
+        else:
+            years = store.years_to_scrape(kind, range(args.since, args.until + 1),
+                                          current_season=args.current_season, max_age=args.max_age * 3600)
+        print(f"{kind}: {len(years)} seasons to scrape")
+        if not years:
+            continue
+
+        _, errors = scrape(
+            kind, years, backend=args.backend, workers=args.workers, retries=args.retries,
+            selenium_fallback=args.selenium_fallback, base_url=args.base_url,
+            on_result=lambda year, rows, kind=kind: store.upsert_year(kind, year, rows)
+        )
+        report.extend(errors)
+
+    if args.export_xlsx:
+        store.export_xlsx(args.export_xlsx)
+    store.close()
+
+    with open(args.errors, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{len(report)} failed seasons (see {args.errors})")
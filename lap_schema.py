@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from race_analytics import decode_track_status
+
+TIME_COLUMNS = ['Time', 'LapTime', 'PitOutTime', 'PitInTime',
+                'Sector1Time', 'Sector2Time', 'Sector3Time',
+                'Sector1SessionTime', 'Sector2SessionTime', 'Sector3SessionTime', 'LapStartTime']
+CATEGORY_COLUMNS = ['Driver', 'DriverNumber', 'Team', 'Compound', 'TrackStatus', 'DeletedReason']
+SMALL_INT_COLUMNS = {'LapNumber': 'UInt16', 'Position': 'UInt8', 'Stint': 'UInt8'}
+FLOAT32_COLUMNS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST', 'TyreLife']
+BOOL_COLUMNS = ['IsPersonalBest', 'FreshTyre', 'Deleted', 'FastF1Generated', 'IsAccurate']
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def normalize_laps(laps):
+    # Applied once at ingest; timedeltas stay timedelta64[ns], i.e. int64 nanoseconds
+    laps = pd.DataFrame(laps).reset_index(drop=True)
+    columns = {}
+
+    for col in TIME_COLUMNS:
+        if col in laps:
+            columns[col] = pd.to_timedelta(laps[col], errors='coerce').astype('timedelta64[ns]')
+    if 'LapStartDate' in laps:
+        columns['LapStartDate'] = pd.to_datetime(laps['LapStartDate'], errors='coerce').astype('datetime64[ns]')
+    for col in CATEGORY_COLUMNS:
+        if col in laps:
+            columns[col] = laps[col].astype(object).map(lambda value: str(value) if pd.notna(value) else None).astype('category')
+    for col, dtype in SMALL_INT_COLUMNS.items():
+        if col in laps:
+            columns[col] = pd.to_numeric(laps[col], errors='coerce').round().astype(dtype)
+    for col in FLOAT32_COLUMNS:
+        if col in laps:
+            columns[col] = pd.to_numeric(laps[col], errors='coerce').astype(np.float32)
+    for col in BOOL_COLUMNS:
+        if col in laps:
+            columns[col] = laps[col] if laps[col].dtype == bool else laps[col].astype('boolean')
+
+    for col, values in columns.items():
+        laps[col] = values
+    if 'TrackStatus' in laps:
+        laps['TrackStatusMask'] = decode_track_status(laps['TrackStatus'])
+    return laps
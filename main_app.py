@@ -1,34 +1,146 @@
+import numpy as np
 import pandas as pd
 import fastf1
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
+from plotly.subplots import make_subplots
+import functools
+import os
 import time
+from contextlib import contextmanager
+
+import profiling
+import race_store
+import telemetry_store
+from analytics_pool import AnalyticsPool
+from assets import AssetStore
+from career_stats import CAREER_DB, CareerStats, race_date
+from charts import line_figure, line_trace, payload_bytes
+from calendar_index import calendar_years, load_calendar
+from delta_time import delta_time
+from time_format import convert_to_time_format, format_lap_times
+from race_cache import RaceCache
+from race_replay import RaceReplay, lap_batches
+from section_cache import SectionCache
+from race_analytics import (TRACK_STATUS, degradation_laps, driver_rows, lap_conditions, rain_intervals,
+                            summary_leaders, weather_summary)
 
 fastf1.Cache.enable_cache('FastF1_cache')
 
 
-def convert_to_time_format(seconds):
-    if pd.isna(seconds):
-        return "N/A"
-    minutes = int(seconds // 60)
-    secs = seconds % 60
-    return f"{minutes}:{secs:.4f}"
+@st.cache_resource
+def get_race_cache():
+    max_mb = int(os.environ.get('F1_RACE_CACHE_MB', 512))
+    return RaceCache(max_bytes=max_mb * 1024 * 1024)
+
+@st.cache_resource
+def get_asset_store():
+    return AssetStore()
+
+@st.cache_resource
+def get_section_cache():
+    return SectionCache(max_entries=int(os.environ.get('F1_SECTION_CACHE_ENTRIES', 512)))
+
+def with_payload(section, compute):
+    with profiling.span('compute', section=section):
+        value = compute()
+    return value, payload_bytes(value)
+
+def section_data(section, inputs, compute):
+    # Memoised on exactly the race plus the widget values in inputs, and reports whether it was recomputed
+    start = time.perf_counter()
+    (value, payload), cached = get_section_cache().get(
+        (section, st.session_state['race_key'], *inputs), lambda: with_payload(section, compute)
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+
+    profiling.count('section_cache.hit' if cached else 'section_cache.miss')
+    st.session_state.setdefault('section_status', {})[section] = 'cached' if cached else 'computed'
+    st.session_state.setdefault('page_payload', {})[section] = payload
+    st.caption(f"{section}: served from cache" if cached else f"{section}: recomputed in {elapsed:.1f} ms")
+    return value
+
+@st.cache_resource
+def get_career_stats():
+    return CareerStats(os.path.join(race_store.STORE_DIR, CAREER_DB))
+
+@st.cache_resource
+def get_analytics_pool():
+    # Shared by every session; F1_ANALYTICS_WORKERS=0 prepares races in the script thread instead
+    return AnalyticsPool(workers=int(os.environ.get('F1_ANALYTICS_WORKERS', 2)))
+
+def read_race(race_key):
+    with profiling.span('analytics_pool.load_race'):
+        return get_analytics_pool().load_race(race_key)
+
+def load_race_data(race_key):
+    race_cache = get_race_cache()
+    if profiling.active() is not None:
+        profiling.count('race_cache.hit' if race_key in race_cache else 'race_cache.miss')
+    return race_cache.get(race_key, lambda: read_race(race_key))
+
+def plotly_chart(fig, **kwargs):
+    with profiling.span('plotly_chart'):
+        st.plotly_chart(fig, **kwargs)
+
+def profiling_enabled():
+    # F1_PROFILE=1 for every session, or ?profile=1 for one browser tab
+    return profiling.enabled_by_env() or st.query_params.get('profile') == '1'
+
+def cache_stats():
+    return {'race_cache': get_race_cache().stats(), 'section_cache': get_section_cache().stats(),
+            'analytics_pool': get_analytics_pool().stats()}
+
+def profile_tables(profile):
+    # (totals per span name, span tree), or (None, None) for a run that opened no spans, such as a replay click
+    if not profile.spans:
+        return None, None
+    totals = pd.DataFrame.from_dict(profile.totals(), orient='index').sort_values('ms', ascending=False)
+    spans = pd.DataFrame(profile.spans).sort_values('start_ms')
+    spans['name'] = ['  ' * depth + name for depth, name in zip(spans['depth'], spans['name'])]
+    return totals, spans.drop(columns='depth')
+
+def profile_panel(profile, caches):
+    with st.expander(f"Profile ({profile.name}): {profile.total_ms:.1f} ms"):
+        totals, spans = profile_tables(profile)
+        if totals is None:
+            st.caption("No spans recorded in this run.")
+        else:
+            st.dataframe(totals, use_container_width=True)
+            st.dataframe(spans, use_container_width=True, hide_index=True)
+        st.write({'this run': dict(profile.counters), **caches})
+
+@contextmanager
+def profiled_run(name):
+    # One profile per script or fragment run, written to the timing log even if the run ends in st.rerun
+    if not profiling_enabled():
+        yield
+        return
+    try:
+        with profiling.run(name) as profile:
+            yield
+    finally:
+        caches = cache_stats()
+        profiling.write_log(profile, extra={'caches': caches})
+    profile_panel(profile, caches)
+
+def profiled_fragment(func):
+    # Spans inside the page's profile; when the fragment reruns on its own it gets a profile of its own
+    timed = profiling.timed(func.__name__)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if profiling.active() is not None:
+            return timed(*args, **kwargs)
+        with profiled_run(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
 
 def retrive_driver_img(driver):
-    race_results = st.session_state['race_data']['race_results']
-    driver_img = race_results.loc[race_results['FullName'] == driver, 'HeadshotUrl'].iloc[0]
-    driver_img = driver_img.replace('1col','3col')
-    if driver_img is None:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{driver}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            driver_img =  data.get('thumbnail', {}).get('source', None)
-            return driver_img
-    else:
-        return driver_img
+    drivers = load_race_data(st.session_state['race_key'])['drivers']
+    return get_asset_store().driver_headshot(driver, drivers[driver]['HeadshotUrl'])
 
 def set_page_config():
     st.set_page_config(page_title="F1 Dashboard", layout="wide")
@@ -42,41 +154,32 @@ def set_page_config():
         """, unsafe_allow_html=True
     )
 
+@profiling.timed()
 def retrive_choice_race():
     col1,col2,col3 = st.columns([10,15,10])
     with col2:
         st.header("F1 Analytics Dashboard 🏎️")
         st.divider()
         st.subheader("Select Race")
-        excel_data = pd.read_excel('race.xlsx')
-        year_select = st.selectbox("Year", options=sorted(excel_data['Year'].unique(), reverse=True))
-        df_year = excel_data[excel_data['Year'] == year_select]
+        calendar = load_calendar()
+        year_select = st.selectbox("Year", options=calendar_years(calendar))
             
-        race_select = st.selectbox("Race", options=df_year['Grand Prix'].unique().tolist())
+        race_select = st.selectbox("Race", options=calendar[year_select])
 
         if st.button("Retrieve Results"):
             progress_bar = st.progress(0)
 
-            for percent_complete in range(35):
-                time.sleep(0.02)
-                progress_bar.progress(percent_complete + 1)
-
-            race = fastf1.get_session(int(year_select), race_select, 'R')
-            race.load(laps=True, telemetry=False, weather=True, messages=False)
+            race_key = race_store.race_key(int(year_select), race_select, 'R')
+            race_data = load_race_data(race_key)
+            progress_bar.progress(60)
+            get_asset_store().prefetch_race(race_data)
             progress_bar.progress(75)
-            st.session_state['race_data'] = {
-                'race': race,
-                'session_info': race.session_info,
-                'race_results': race.results,
-                'weather_data': race.weather_data if race.weather_data is not None else None,
-                'laps': race.laps,
-                'circuit_info': race.get_circuit_info()
-            }
+            st.session_state['race_key'] = race_key
             progress_bar.progress(100)
-            time.sleep(1)
             st.rerun()
 
 
+@profiling.timed()
 def set_race_name_flag(session_info):
     col1, col2 = st.columns([10, 1])
     with col1:
@@ -84,28 +187,21 @@ def set_race_name_flag(session_info):
 
     with col2:
         country_name = session_info['Meeting']['Country']['Name']
-        if 'race_flag' not in st.session_state:
-            try:
-                response = requests.get(f"https://restcountries.com/v3.1/name/{country_name}")
-                if response.status_code == 200:
-                    country_data = response.json()
-                    flag_url = country_data[0]['flags']['png']
-                    st.session_state['race_flag'] = flag_url
-                else:
-                    st.write("Country flag not found or an error occurred.")
-            except:
-                st.write("Country flag not found or an error occurred.")
-        if 'race_flag' in st.session_state:
+        flag_url = get_asset_store().country_flag(country_name)
+        if flag_url:
             st.markdown(
                 f"""
                 <div style="border: 2px solid black; display: inline-block;">
-                    <img src="{st.session_state['race_flag']}" width="150">
+                    <img src="{flag_url}" width="150">
                 </div>
                 """,
                 unsafe_allow_html=True
             )
+        else:
+            st.write("Country flag not found or an error occurred.")
 
-def set_race_info_results(session_info, race, race_results, race_weather, laps, circuit_info):
+@profiling.timed()
+def set_race_info_results(session_info, total_laps, race_results, race_weather, laps, circuit_info):
     race_info, race_result = st.columns(2)
 
     with race_info:
@@ -114,18 +210,19 @@ def set_race_info_results(session_info, race, race_results, race_weather, laps,
         st.write(f"**Circuit**: {session_info['Meeting']['Circuit']['ShortName']}")
         st.write(f"**Start Time**: {session_info['StartDate']}")
         st.write(f"**End Time**: {session_info['EndDate']}")
-        st.write(f"**Total Laps**: {race.total_laps}")
+        st.write(f"**Total Laps**: {total_laps}")
 
         st.header("Weather Information")
         if race_weather is not None:
+            weather = section_data('weather', (), lambda: weather_summary(race_weather))
             col1, col2 = st.columns(2)
             with col1:
-                st.write(f"**Average AirTemp** : {race_weather['AirTemp'].mean():.2f} °C")
-                st.write(f"**Average Windspeed** : {race_weather['WindSpeed'].mean():.2f} m/s")
+                st.write(f"**Average AirTemp** : {weather['AirTemp']:.2f} °C")
+                st.write(f"**Average Windspeed** : {weather['WindSpeed']:.2f} m/s")
             with col2:
-                st.write(f"**Average TrackTemp** : {race_weather['TrackTemp'].mean():.2f} °C")
-                st.write(f"**Average Humidity** : {race_weather['Humidity'].mean():.2f} %")
-            st.write(f"**Rainfall** : {race_weather['Rainfall'].sum():.2f} mm")
+                st.write(f"**Average TrackTemp** : {weather['TrackTemp']:.2f} °C")
+                st.write(f"**Average Humidity** : {weather['Humidity']:.2f} %")
+            st.write(f"**Rain** : {weather['RainShare']:.0%} of the weather samples" if weather['RainShare'] else "**Rain** : dry")
         else:
             st.write("Weather information not available")
 
@@ -133,25 +230,18 @@ def set_race_info_results(session_info, race, race_results, race_weather, laps,
         col1, col2 = st.columns(2)
 
         with col1:
-            st.write(f"**Total No of Corners**: {len(circuit_info.corners)} ")
-            st.write(f"**Total No of Marshal Sectors**: {len(circuit_info.marshal_sectors)} ")
+            if circuit_info is not None:
+                st.write(f"**Total No of Corners**: {len(circuit_info.corners)} ")
+                st.write(f"**Total No of Marshal Sectors**: {len(circuit_info.marshal_sectors)} ")
+            else:
+                st.write("Circuit information not available")
 
         with col2:
-            if 'circuit_image' not in st.session_state:
-                wiki_api_url = f"https://en.wikipedia.org/w/api.php?action=query&titles={session_info['Meeting']['Name']}&prop=pageimages&format=json&pithumbsize=250"
-                response = requests.get(wiki_api_url).json()
-                pages = response['query']['pages']
-                image_url = None
-                for page_id in pages:
-                    if 'thumbnail' in pages[page_id]:
-                        image_url = pages[page_id]['thumbnail']['source']
-                if image_url:
-                    st.session_state['circuit_image'] = image_url
-                else:
-                    st.write("No image available")
-
-            if 'circuit_image' in st.session_state:
-                st.image(st.session_state['circuit_image'])
+            image_url = get_asset_store().circuit_image(session_info['Meeting']['Name'])
+            if image_url:
+                st.image(image_url)
+            else:
+                st.write("No image available")
 
     with race_result:
         st.header("Race Results")
@@ -159,67 +249,28 @@ def set_race_info_results(session_info, race, race_results, race_weather, laps,
 
         # st.write(f"**Fastest Lap**: {fastest_lap_driver} ({formatted_time})")
 
-        race_results_display = race_results[['Position', 'DriverNumber', 'Abbreviation', 'FullName', 'TeamName', 'CountryCode', 'Points']].reset_index(drop=True)
-        race_results_display.set_index('Position', inplace=True)
+        race_results_display = section_data('race_results', (), lambda: (
+            race_results[['Position', 'DriverNumber', 'Abbreviation', 'FullName', 'TeamName', 'CountryCode', 'Points']]
+            .reset_index(drop=True).set_index('Position')
+        ))
         st.table(race_results_display)
-    
-    st.divider()
-
-def set_race_events(laps):
-    st.header("Race Events")
-    track_st_data = laps[laps['DriverNumber'] == laps['DriverNumber'].iloc[0]][['LapNumber', 'TrackStatus']]
-    track_st_cond = {
-            '1': 'Track clear',
-            '2': 'Yellow flag',
-            '4': 'Safety Car',
-            '5': 'Red Flag',
-            '6': 'Virtual Safety Car',
-            '7': 'Virtual Safety Car ending'
-    }
-    track_st_data['Track Condition'] = track_st_data['TrackStatus'].map(track_st_cond)
-    track_status = {}
-
-    for index, data in track_st_data.iterrows(): 
-        track_st = list(str(data['TrackStatus'])) 
-        status_list = [track_st_cond.get(sta) for sta in track_st]
-        track_status[int(data['LapNumber'])] = status_list
-        
-    track_status_df = pd.DataFrame(list(track_status.items()), columns=['LapNumber', 'Events'])
-    track_status_df = pd.DataFrame(track_status_df.explode('Events'))
-
-    events = []
-    current_event = None
-    event_laps = []
-
-    for i, row in track_status_df.iterrows():
-        lap = row['LapNumber']
-        event = row['Events']
-            
-        if event != current_event:
-            if current_event is not None:
-                events.append((current_event, event_laps))
-                
-            current_event = event
-            event_laps = [lap]
-        else:
-            event_laps.append(lap)
 
-    if current_event is not None:
-        events.append((current_event, event_laps))
+    st.divider()
 
-    plot_data = []
-    for event, lapsno in events:
-        for lap in lapsno:
-            plot_data.append({'Lap': lap, 'Event': event})
+def race_events_chart(lap_status):
+    masks = lap_status.to_numpy()
+    plot_df = pd.concat([
+        pd.DataFrame({'Lap': lap_status.index[((masks >> bit) & 1) == 1], 'Event': event})
+        for bit, event in TRACK_STATUS.items()
+    ]).sort_values('Lap', kind='stable')
 
-    plot_df = pd.DataFrame(plot_data)
-    fig = px.scatter(plot_df, 
-                    x='Lap', 
+    fig = px.scatter(plot_df,
+                    x='Lap',
                     y='Event',
                     labels={'Lap': 'Lap Number', 'Event': 'Events'},
                     hover_name='Event',
                     color='Event'
-                    )  
+                    )
 
     fig.update_traces(marker=dict(size=15))
     fig.update_layout(
@@ -228,18 +279,161 @@ def set_race_events(laps):
         showlegend=False,
         height=400
     )
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
-            
+@profiling.timed()
+def set_race_events(lap_status, race_events):
+    st.header("Race Events")
+
+    fig = section_data('race_events', (), lambda: race_events_chart(lap_status))
+
+    col1, col2 = st.columns([5, 2])
+    with col1:
+        plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        st.dataframe(race_events.set_index('Status'), use_container_width=True)
+
+    st.divider()
+
+
+def conditions_charts(laps):
+    conditions = lap_conditions(laps)
+    timeline = line_figure(conditions.reset_index(), 'LapNumber', ['TrackTemp', 'AirTemp'], x_title='Lap Number',
+                           y_title='Temperature (°C)')
+    for start_lap, end_lap in rain_intervals(conditions).itertuples(index=False):
+        timeline.add_vrect(x0=start_lap - 0.5, x1=end_lap + 0.5, fillcolor='steelblue', opacity=0.2, line_width=0,
+                           annotation_text='Rain', annotation_position='top left')
+
+    # Racing laps only, so pit and Safety Car laps don't swamp the temperature effect
+    racing = laps[degradation_laps(laps)]
+    plot_df = pd.DataFrame({
+        'Track Temp (°C)': racing['TrackTemp'].to_numpy(),
+        'Lap Time (s)': racing['LapTime'].dt.total_seconds().to_numpy(),
+        'Compound': racing['Compound'].astype(str).to_numpy(),
+        'Driver': racing['Driver'].astype(str).to_numpy(),
+    })
+    scatter = px.scatter(plot_df, x='Track Temp (°C)', y='Lap Time (s)', color='Compound', hover_name='Driver',
+                         render_mode='webgl')
+    return timeline, scatter
+
+@profiling.timed()
+def set_race_conditions(laps):
+    st.header("Race Conditions")
+    if 'TrackTemp' not in laps:
+        st.write("Weather information not available")
+        st.divider()
+        return
+
+    timeline, scatter = section_data('race_conditions', (), lambda: conditions_charts(laps))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Temperature and Rain per Lap")
+        plotly_chart(timeline, use_container_width=True)
+    with col2:
+        st.subheader("Lap Time vs Track Temperature")
+        plotly_chart(scatter, use_container_width=True)
     st.divider()
 
+def pit_stop_leaderboard(pit_stops, driver_names):
+    leaderboard = pit_stops.dropna(subset=['Duration']).sort_values('Duration', kind='stable').reset_index()
+    fastest_df = pd.DataFrame({
+        'Driver': leaderboard['Driver'].map(driver_names).to_numpy(),
+        'Lap': leaderboard['LapNumber'].astype(int).to_numpy(),
+        'Time Taken': format_lap_times(leaderboard['Duration'].to_numpy())
+    }, index=pd.RangeIndex(1, len(leaderboard) + 1, name='Rank'))
+
+    totals = pit_stops.groupby(level='Driver')['Duration'].agg(['size', 'sum']).sort_values('sum')
+    totals_df = pd.DataFrame({
+        'Driver': totals.index.map(driver_names),
+        'Stops': totals['size'].to_numpy(),
+        'Total Time': format_lap_times(totals['sum'].to_numpy())
+    }).set_index('Driver')
+    return fastest_df.head(10), totals_df
+
+@profiling.timed()
+def set_pit_stop_leaderboard(pit_stops, driver_names):
+    st.header("Pit Stop Leaderboard")
+
+    fastest_df, totals_df = section_data('pit_stop_leaderboard', (), lambda: pit_stop_leaderboard(pit_stops, driver_names))
+    col1, col2 = st.columns([3, 2])
+
+    with col1:
+        st.subheader("Fastest Pit Stops")
+        st.dataframe(fastest_df, use_container_width=True)
+
+    with col2:
+        st.subheader("Total Pit Lane Time")
+        st.dataframe(totals_df, use_container_width=True)
 
-def set_driver_selection(race_results):
+    st.divider()
+
+RACE_TRACE_VIEWS = {
+    'Race trace': ('RaceTrace', "Ahead of the winner's average pace (s)", False),
+    'Gap to leader': ('GapToLeader', 'Gap to leader (s)', True),
+    'Interval': ('Interval', 'Interval to car ahead (s)', True),
+}
+
+def race_trace_chart(lap_matrix, view):
+    column, y_title, reverse_y = RACE_TRACE_VIEWS[view]
+    return line_figure(lap_matrix.frame(column).reset_index(), 'LapNumber', lap_matrix.drivers, x_title='Lap Number',
+                       y_title=y_title, reverse_y=reverse_y)
+
+@st.fragment
+@profiled_fragment
+def set_race_trace(lap_matrix):
+    # The whole field from the lap matrix; switching the view only reruns this chart
+    st.header("Race Trace")
+    view = st.radio("Show", list(RACE_TRACE_VIEWS), horizontal=True, key='race_trace_view')
+    fig = section_data('race_trace', (view,), lambda: race_trace_chart(lap_matrix, view))
+    plotly_chart(fig, use_container_width=True)
+    st.divider()
+
+def driver_profile(driver):
+    position = int(driver['Position'])
+    team_name = driver['TeamName']
+
+    race_finished = driver['Status'].strip()
+    driver_info = {
+        'Parameter' : ['Poition in race', 'Team'],
+        'Value' : [position, team_name]
+    }
+    points = driver['Points']
+    if race_finished.lower() == 'finished':
+        driver_info['Parameter'].append('Status')
+        driver_info['Value'].append(race_finished)
+        driver_info['Parameter'].append('Points')
+        driver_info['Value'].append(points)
+
+    elif race_finished.endswith('Laps') or race_finished.endswith('Lap'):
+        driver_info['Parameter'].append('Status')
+        driver_info['Value'].append(f"Finished ({race_finished})")
+        driver_info['Parameter'].append('Points')
+        driver_info['Value'].append(points)
+
+    else:
+        driver_info['Parameter'].append('Status')
+        driver_info['Value'].append('Not Finished')
+        driver_info['Parameter'].append('Reason')
+        driver_info['Value'].append(race_finished)
+
+    driver_info_df = pd.DataFrame(driver_info)
+    driver_info_df.set_index('Parameter',inplace=True)
+    return driver_info_df
+
+def career_table(profile):
+    labels = {'races': 'Races', 'points': 'Points', 'wins': 'Wins', 'podiums': 'Podiums', 'dnfs': 'DNFs',
+              'places_gained': 'Places Gained', 'fastest_laps': 'Fastest Laps'}
+    return pd.DataFrame(
+        [profile['season'], profile['career']], index=['Season to date', 'All seasons']
+    ).rename(columns=labels)
+
+@profiling.timed()
+def set_driver_selection(drivers, session_info):
     driver_info, driver_sel = st.columns([5, 3])
 
     with driver_sel:
-        drivers = race_results['FullName'].unique()
-        selected_driver = st.selectbox("Select Driver", drivers)
+        selected_driver = st.selectbox("Select Driver", list(drivers))
         st.session_state['selected_driver'] = selected_driver
 
     with driver_info:
@@ -247,491 +441,615 @@ def set_driver_selection(race_results):
 
         with col1:
             st.image(retrive_driver_img(selected_driver), use_column_width=True)
-            
+
         with col2:
             st.header(selected_driver)
-            position = int(race_results.loc[race_results['FullName'] == selected_driver, 'Position'].iloc[0])
-            team_name = race_results.loc[race_results['FullName'] == selected_driver, 'TeamName'].iloc[0]
-
-            race_finished = race_results.loc[race_results['FullName'] == selected_driver, 'Status'].iloc[0].strip()
-            driver_info = {
-                'Parameter' : ['Poition in race', 'Team'],
-                'Value' : [position, team_name]
-            }
-            points = race_results.loc[race_results['FullName'] == selected_driver, 'Points'].iloc[0]
-            if race_finished.lower() == 'finished':
-                driver_info['Parameter'].append('Status')
-                driver_info['Value'].append(race_finished)
-                driver_info['Parameter'].append('Points')
-                driver_info['Value'].append(points)
-
-            elif race_finished.endswith('Laps') or race_finished.endswith('Lap'):
-                driver_info['Parameter'].append('Status')
-                driver_info['Value'].append(f"Finished ({race_finished})")
-                driver_info['Parameter'].append('Points')
-                driver_info['Value'].append(points)
-
-            else:
-                driver_info['Parameter'].append('Status')
-                driver_info['Value'].append('Not Finished')
-                driver_info['Parameter'].append('Reason')
-                driver_info['Value'].append(race_finished)
-            
-            driver_info_df = pd.DataFrame(driver_info)
-            driver_info_df.set_index('Parameter',inplace=True)
-
+            driver_info_df = section_data('driver_profile', (selected_driver,), lambda: driver_profile(drivers[selected_driver]))
             st.dataframe(driver_info_df, use_container_width=True)
 
+            st.subheader("Races in local store")
+            year = st.session_state['race_key'][0]
+            profile = get_career_stats().driver_profile(selected_driver, year, race_date(session_info))
+            st.dataframe(career_table(profile), use_container_width=True)
+
     st.divider()
-    
-def set_lap_wise_analysis(laps, race_results):
-    driver_abb = race_results.loc[race_results['FullName'] == st.session_state['selected_driver'] , 'Abbreviation'].iloc[0]
 
-    filtered_data = laps[laps['Driver'] == driver_abb]
+@profiling.timed()
+def set_lap_wise_analysis(lap_index, drivers, driver_stats, stints, tyre_compounds, pit_stops):
+    driver_abb = drivers[st.session_state['selected_driver']]['Abbreviation']
+
+    lap_time_pit_stop(lap_index, driver_abb, driver_stats, pit_stops)
+    tire_dist_sec_time(lap_index, driver_abb, driver_stats, stints, tyre_compounds)
+    lap_position(lap_index, driver_abb)
+
+def lap_time_tables(filtered_data, stats, pit_stops):
+    table_data = filtered_data[['LapNumber', 'LapTime']].copy()
+    table_data['LapTime'] = format_lap_times(table_data['LapTime'])
+    table_data.set_index('LapNumber', inplace=True)
+
+    fig = line_figure(filtered_data, 'LapNumber', ['LapTime'], x_title='Lap Number', y_title='Lap Time (s)')
 
-    lap_time_pit_stop(filtered_data)
-    tire_dist_sec_time(filtered_data)
-    lap_position(filtered_data)
+    try:
+        lap_time_stats = {
+            'Parameter': ['Fastest Time', 'Average Time', 'Green Flag Average'],
+            'Time': format_lap_times(stats[['LapTime_min', 'LapTime_mean', 'LapTime_green_mean']].to_numpy(dtype=float)),
+            'Lap Number' : [int(stats['LapTime_min_lap']) if pd.notna(stats['LapTime_min_lap']) else 'N/A', 'N/A', 'N/A']
+        }
+        lap_time_stats_df = pd.DataFrame(lap_time_stats)
+        lap_time_stats_df.set_index("Parameter", inplace=True)
+
+        pit_data_df = pd.DataFrame({
+            'Pit In Lap': pit_stops['LapNumber'].astype(int).to_numpy(),
+            'Time Taken': format_lap_times(pit_stops['Duration'].to_numpy())
+        })
+        pit_data_df.set_index('Pit In Lap', inplace=True)
+        pit_stats = (lap_time_stats_df, pit_data_df, convert_to_time_format(pit_stops['Duration'].sum()))
+    except Exception as e:
+        pit_stats = None
 
-def lap_time_pit_stop(filtered_data):
+    return table_data, fig, pit_stats
+
+@profiling.timed()
+def lap_time_pit_stop(lap_index, driver_abb, driver_stats, pit_stops):
     st.header("Lap wise Driver Analysis")
 
+    table_data, fig, pit_stats = section_data('lap_times', (driver_abb,), lambda: lap_time_tables(
+        lap_index.driver_laps(driver_abb), driver_stats.loc[driver_abb], driver_rows(pit_stops, driver_abb)
+    ))
+
     col1, col2, col3 = st.columns([2, 5, 2])
 
     with col1:
         st.subheader("Lap Time per Lap")
-        table_data = filtered_data[['LapNumber', 'LapTime']].copy()
-        table_data['LapTime'] = table_data['LapTime'].apply(lambda x: convert_to_time_format(x.total_seconds()))
-        table_data.set_index('LapNumber', inplace=True)
-
         st.dataframe(table_data, use_container_width=True)
 
     with col2:
-        fig = px.line(filtered_data, x='LapNumber', y='LapTime')
-        st.plotly_chart(fig)
+        plotly_chart(fig)
 
     with col3:
-        try:
-            st.subheader("Lap Time Stats")
-
-            fastest_lap_number = filtered_data.loc[filtered_data['LapTime'].dropna().idxmin(), 'LapNumber']
-            lap_time_stats = {
-                'Parameter': ['Fastest Time', 'Average Time'],
-                'Time': [
-                    convert_to_time_format(filtered_data['LapTime'].dropna().min().total_seconds()),
-                    convert_to_time_format(filtered_data['LapTime'].dropna().mean().total_seconds())
-                ],
-                'Lap Number' : [int(fastest_lap_number), 'N/A']
-            }
-            lap_time_stats_df = pd.DataFrame(lap_time_stats)
-            lap_time_stats_df.set_index("Parameter", inplace=True)
-
+        st.subheader("Lap Time Stats")
+        if pit_stats is not None:
+            lap_time_stats_df, pit_data_df, total_pit_time = pit_stats
             st.dataframe(lap_time_stats_df, use_container_width=True)
 
-            pit_data = filtered_data[filtered_data['PitInTime'].notna()].copy()
-            pit_table_data = []
             st.subheader("Pit Stop Data")
-            total_time = 0
-            for index, row in pit_data.iterrows():
-                lap_number = int(row['LapNumber'])
-                pit_in_time = row['PitInTime']
-                next_lap = filtered_data[filtered_data['LapNumber'] == (lap_number + 1)].iloc[0]
-                pit_out_time = next_lap['PitOutTime'] if pd.notna(next_lap['PitOutTime']) else "Not Available"
-                        
-                pit_duration = (pit_out_time - pit_in_time).total_seconds()
-                total_time += pit_duration
-                duration_str = f"{convert_to_time_format(pit_duration)}"
-                    
-                pit_table_data.append([lap_number, duration_str])
-                
-            pit_data_df = pd.DataFrame(pit_table_data, columns=['Pit In Lap', 'Time Taken'])
-            pit_data_df.set_index('Pit In Lap', inplace=True)
             st.dataframe(pit_data_df, use_container_width=True)
-                
-            st.write(f"**Total Pit Stop Time** - {convert_to_time_format(total_time)}")
 
-        except Exception as e:
-            st.write("Error while fetching Data")    
+            st.write(f"**Total Pit Stop Time** - {total_pit_time}")
+        else:
+            st.write("Error while fetching Data")
     st.divider()
 
-def tire_dist_sec_time(filtered_data):
+def tyre_sector_tables(filtered_data, stats, stints):
+    compound_counts = stints.groupby('Compound')['Laps'].sum()
+    pie = px.pie(compound_counts, values=compound_counts.values, names=compound_counts.index, hole=0.3)
+
+    compound_df = pd.DataFrame({
+        'Compound Type': stints['Compound'].to_numpy(),
+        'Start Lap': stints['StartLap'].to_numpy(),
+        'End Lap': stints['EndLap'].to_numpy(),
+        'Tyre Age': stints['StartTyreLife'].to_numpy(),
+        'Deg (s/lap)': stints['DegRate'].round(3).to_numpy(),
+        'Base Pace': format_lap_times(stints['BasePace'].to_numpy()),
+    })
+    compound_df.set_index('Compound Type', inplace=True)
+
+    time_col = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+    table_data = filtered_data[['LapNumber'] + time_col].copy()
+    for col in time_col:
+        table_data[col] = format_lap_times(table_data[col])
+    table_data.set_index('LapNumber', inplace=True)
+
+    fig = line_figure(filtered_data, 'LapNumber', time_col, x_title='Lap Number', y_title='Sector Time (s)')
+
+    sector_data = {
+        'Sector': time_col,
+        'Fastest Time': format_lap_times(stats[[f'{col}_min' for col in time_col]].to_numpy(dtype=float)),
+        'Slowest Time': format_lap_times(stats[[f'{col}_max' for col in time_col]].to_numpy(dtype=float)),
+        'Average Time': format_lap_times(stats[[f'{col}_mean' for col in time_col]].to_numpy(dtype=float)),
+        'Total Time': format_lap_times(stats[[f'{col}_sum' for col in time_col]].to_numpy(dtype=float))
+    }
+    sector_df = pd.DataFrame(sector_data)
+    sector_df.set_index('Sector', inplace=True)
+
+    return pie, compound_df, table_data, fig, sector_df
+
+@profiling.timed()
+def tire_dist_sec_time(lap_index, driver_abb, driver_stats, stints, tyre_compounds):
+    pie, compound_df, table_data, fig, sector_df = section_data('tyres_sectors', (driver_abb,), lambda: tyre_sector_tables(
+        lap_index.driver_laps(driver_abb), driver_stats.loc[driver_abb], driver_rows(stints, driver_abb)
+    ))
+
     col1, col2 = st.columns([3, 8])
 
     with col1:
         st.subheader("Tire Usage Distribution")
-        compound_counts = filtered_data['Compound'].value_counts()
-
-        fig = px.pie(compound_counts, values=compound_counts.values, names=compound_counts.index, hole=0.3)
-        st.plotly_chart(fig)
-        
-        compound_data = []
-        current_compound = None
-        start_lap = None
-
-        for _, row in filtered_data.iterrows():
-            if row['Compound'] != current_compound:
-                if current_compound is not None:
-                    compound_data.append([current_compound, start_lap, row['LapNumber'] - 1])
-                
-                current_compound = row['Compound']
-                start_lap = row['LapNumber']
-        
-        compound_data.append([current_compound, start_lap, filtered_data['LapNumber'].max()])
-
-        compound_df = pd.DataFrame(compound_data, columns=['Compound Type', 'Start Lap', 'End Lap'])
-        compound_df.set_index('Compound Type', inplace=True)
-
+        plotly_chart(pie)
         st.dataframe(compound_df, use_container_width=True)
-    
+
     with col2:
         st.subheader("Sector Time per Lap")
         col21, col22 = st.columns([5,3])
-    
+
         with col22:
-            table_data = filtered_data[['LapNumber', 'Sector1Time', 'Sector2Time', 'Sector3Time']].copy()
-            time_col = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+            st.dataframe(table_data, use_container_width=True)
+        with col21:
+            plotly_chart(fig)
 
-            for col in time_col:
-                table_data[col] = table_data[col].apply(lambda x: convert_to_time_format(x.total_seconds()))
+        st.dataframe(sector_df, use_container_width=True)
 
-            table_data.set_index('LapNumber', inplace=True)
+    st.subheader("Tyre Degradation by Compound")
+    st.caption("Fuel-corrected lap time against tyre age per stint, over green-flag laps without pit in/out or deleted times")
+    compounds_df = section_data('tyre_compounds', (), lambda: compound_table(tyre_compounds))
+    st.dataframe(compounds_df, use_container_width=True)
+    st.divider()
 
-            st.dataframe(table_data, use_container_width=True)
-        with col21:
-            fig = px.line(filtered_data, x='LapNumber', y=['Sector1Time', 'Sector2Time', 'Sector3Time'])
-            st.plotly_chart(fig)
-
-        sector_data = {
-            'Sector': time_col,
-            'Fastest Time': [convert_to_time_format(filtered_data[col].min().total_seconds()) for col in time_col],
-            'Slowest Time': [convert_to_time_format(filtered_data[col].max().total_seconds()) for col in time_col],
-            'Average Time': [convert_to_time_format(filtered_data[col].mean().total_seconds()) for col in time_col],
-            'Total Time': [convert_to_time_format(filtered_data[col].sum().total_seconds()) for col in time_col]
-        }
+def compound_table(tyre_compounds):
+    return pd.DataFrame({
+        'Stints': tyre_compounds['Stints'],
+        'Laps': tyre_compounds['Laps'],
+        'Deg (s/lap)': tyre_compounds['DegRate'].round(3),
+        'Base Pace': format_lap_times(tyre_compounds['BasePace'].to_numpy()),
+    }, index=tyre_compounds.index)
 
-        sector_df = pd.DataFrame(sector_data)
+def position_tables(filtered_data):
+    pos_df = filtered_data[['LapNumber', 'Position','Deleted', 'DeletedReason']]
 
-        sector_df.set_index('Sector', inplace=True)
+    fig = line_figure(pos_df, 'LapNumber', ['Position'], x_title='Lap Number', y_title='Position', reverse_y=True)
 
-        st.dataframe(sector_df, use_container_width=True)
-    st.divider()
+    # First and last lap with a position; a driver without any (DNS) shows N/A
+    classified = pos_df['Position'].dropna()
+    if classified.empty:
+        start_position = end_position = pos_gained = 'N/A'
+    else:
+        start_position = int(classified.iloc[0])
+        end_position = int(classified.iloc[-1])
+        pos_gained = start_position - end_position
+
+    analysis_data = {
+        "Metric": ["Start Position", "End Position", "Position Change"],
+        "Value": [start_position, end_position, pos_gained]
+    }
+    analysis_df = pd.DataFrame(analysis_data).set_index('Metric')
+
+    deleted_laps = pos_df[pos_df['Deleted'] == True].set_index('LapNumber')[['DeletedReason']]
+
+    return pos_df[['LapNumber', 'Position']].set_index('LapNumber'), fig, analysis_df, deleted_laps
 
-def lap_position(filtered_data):
+@profiling.timed()
+def lap_position(lap_index, driver_abb):
     st.subheader("Lap wise Position Analysis")
+    positions, fig, analysis_df, deleted_laps = section_data('lap_position', (driver_abb,), lambda: position_tables(
+        lap_index.driver_laps(driver_abb)
+    ))
+
     pos_df_dis,pos_gr, pos_an = st.columns([2,6,2])
-    pos_df = filtered_data[['LapNumber', 'Position','Deleted', 'DeletedReason']]
     with pos_df_dis:
-        st.dataframe(pos_df[['LapNumber', 'Position']].set_index('LapNumber'), use_container_width=True)
+        st.dataframe(positions, use_container_width=True)
 
     with pos_gr:
-        fig = px.line(pos_df, x='LapNumber', y='Position')
-        fig.update_yaxes(autorange='reversed')
-        st.plotly_chart(fig)
+        plotly_chart(fig)
 
     with pos_an:
         st.subheader("Position Analysis")
-        
-        start_position = int(pos_df['Position'].iloc[0])
-        try:
-            end_position = int(pos_df['Position'].iloc[-1])
-        except ValueError:
-            end_position = int(pos_df['Position'].iloc[-2])
-        pos_gained = start_position - end_position
-
-        analysis_data = {
-            "Metric": ["Start Position", "End Position", "Position Change"],
-            "Value": [start_position, end_position, pos_gained]
-        }
-        analysis_df = pd.DataFrame(analysis_data).set_index('Metric')
-
-        st.dataframe(analysis_df,use_container_width=True) 
+        st.dataframe(analysis_df,use_container_width=True)
 
         st.subheader("Deleted Laps")
-
-        deleted_laps = pos_df[pos_df['Deleted'] == True]
-
         if not deleted_laps.empty:
-            deleted_laps.set_index('LapNumber', inplace=True)
-            st.dataframe(deleted_laps[['DeletedReason']])
+            st.dataframe(deleted_laps)
         else:
             st.write("No laps were deleted.")
 
-    st.divider()  
-
-def set_driver_speed(laps, race_results):
-    driver_abb = race_results.loc[race_results['FullName'] == st.session_state['selected_driver'] , 'Abbreviation'].iloc[0]
-
-    filtered_data = laps[laps['Driver'] == driver_abb]
+    st.divider()
 
+def speed_tables(filtered_data, stats):
     speed_metrics = {
-        'Max Speed Sector 1': filtered_data['SpeedI1'].max(),
-        'Avg Speed Sector 1': filtered_data['SpeedI1'].mean(),
-        'Max Speed Sector 2': filtered_data['SpeedI2'].max(),
-        'Avg Speed Sector 2': filtered_data['SpeedI2'].mean(),
-        'Max Speed Finish Line': filtered_data['SpeedFL'].max(),
-        'Avg Speed Finish Line': filtered_data['SpeedFL'].mean()
+        'Max Speed Sector 1': stats['SpeedI1_max'],
+        'Avg Speed Sector 1': stats['SpeedI1_mean'],
+        'Max Speed Sector 2': stats['SpeedI2_max'],
+        'Avg Speed Sector 2': stats['SpeedI2_mean'],
+        'Max Speed Finish Line': stats['SpeedFL_max'],
+        'Avg Speed Finish Line': stats['SpeedFL_mean']
     }
+    fig = px.bar(x=list(speed_metrics.keys()), y=list(speed_metrics.values()), title='Speed Metrics')
+
+    table_data = filtered_data[['LapNumber', 'SpeedI1', 'SpeedI2', 'SpeedFL']].copy()
+    table_data.rename(columns={
+        'SpeedI1': 'SpeedI1 (km/h)',
+        'SpeedI2': 'SpeedI2 (km/h)',
+        'SpeedFL': 'SpeedFL (km/h)'
+    }, inplace=True)
+    table_data.set_index('LapNumber', inplace=True)
+    return fig, table_data
+
+@profiling.timed()
+def set_driver_speed(lap_index, drivers, driver_stats):
+    driver_abb = drivers[st.session_state['selected_driver']]['Abbreviation']
 
     st.subheader("Speed Metrics")
+    fig, table_data = section_data('driver_speed', (driver_abb,), lambda: speed_tables(
+        lap_index.driver_laps(driver_abb), driver_stats.loc[driver_abb]
+    ))
+
     col1, col2 = st.columns([5,3])
     with col1:
-
-        fig = px.bar(x=list(speed_metrics.keys()), y=list(speed_metrics.values()), title='Speed Metrics')
-        st.plotly_chart(fig)
+        plotly_chart(fig)
 
     with col2:
-        table_data = filtered_data[['LapNumber', 'SpeedI1', 'SpeedI2', 'SpeedFL']].copy()
-        table_data.rename(columns={
-            'SpeedI1': 'SpeedI1 (km/h)',
-            'SpeedI2': 'SpeedI2 (km/h)',
-            'SpeedFL': 'SpeedFL (km/h)'
-        }, inplace=True)
-        table_data.set_index('LapNumber', inplace=True)
         st.dataframe(table_data, use_container_width=True)
     st.divider()
 
+def telemetry_chart(trace):
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        row_heights=[0.5, 0.25, 0.25], subplot_titles=['Speed (km/h)', 'Throttle (%)', 'Brake'])
+    fig.add_trace(line_trace(trace['Distance'], trace['Speed'], 'Speed'), row=1, col=1)
+    fig.add_trace(line_trace(trace['Distance'], trace['Throttle'], 'Throttle'), row=2, col=1)
+    fig.add_trace(line_trace(trace['Distance'], trace['Brake'].astype(int), 'Brake', line_shape='hv'), row=3, col=1)
+    fig.update_layout(height=600, showlegend=False)
+    fig.update_xaxes(title_text='Distance (m)', row=3, col=1)
+    return fig
+
+@profiling.timed()
+def set_driver_telemetry(drivers):
+    # Opt-in: nothing is read from the telemetry store until the toggle is switched on
+    if not st.toggle("Show telemetry", key='show_telemetry'):
+        return
+
+    st.subheader("Telemetry")
+    year, grand_prix, session_type = st.session_state['race_key']
+    index = telemetry_store.telemetry_index(year, grand_prix, session_type)
+    if index is None:
+        st.write("Telemetry is not stored for this race yet.")
+        if st.button("Load telemetry"):
+            with st.spinner("Loading car data for every driver..."):
+                get_analytics_pool().load_telemetry(st.session_state['race_key'])
+            st.rerun(scope='fragment')
+        st.divider()
+        return
 
-def set_driver_v_driver(laps, race_results):
-    drivers_selection(race_results)
-    race_result_comp(laps, race_results)
-    lap_v_lap(laps)
-    pos_v_lap_graphs(laps)
-    speed_comp(laps)
+    driver_abb = drivers[st.session_state['selected_driver']]['Abbreviation']
+    laps = index.loc[index['Driver'] == driver_abb, 'LapNumber'].tolist()
+    if not laps:
+        st.write("No telemetry for this driver.")
+        st.divider()
+        return
 
-def drivers_selection(race_results):
+    lap = st.selectbox("Select Lap", laps, key='telemetry_lap')
+    fig = section_data('telemetry', (driver_abb, lap), lambda: telemetry_chart(telemetry_store.lap_telemetry(
+        year, grand_prix, driver_abb, lap, session_type, columns=['Distance', 'Speed', 'Throttle', 'Brake'], index=index
+    )))
+    plotly_chart(fig, use_container_width=True)
+    st.divider()
+
+@st.fragment
+@profiled_fragment
+def driver_section(lap_index, drivers, driver_stats, stints, tyre_compounds, pit_stops, session_info):
+    # Reruns on its own when the driver changes; the rest of the page is left as rendered
+    set_driver_selection(drivers, session_info)
+    set_lap_wise_analysis(lap_index, drivers, driver_stats, stints, tyre_compounds, pit_stops)
+    set_driver_speed(lap_index, drivers, driver_stats)
+    set_driver_telemetry(drivers)
+
+
+@profiling.timed()
+def set_driver_v_driver(lap_matrix, drivers, driver_stats, circuit_info):
+    selected = drivers_selection(drivers)
+    if not selected:
+        st.write("Select at least one driver to compare.")
+        st.divider()
+        return
+
+    abvs = tuple(drivers[driver]['Abbreviation'] for driver in selected)
+    race_result_comp(drivers, driver_stats, selected)
+    lap_v_lap(lap_matrix, abvs, selected)
+    if len(abvs) >= 2:
+        delta_comp(abvs[0], abvs[1], circuit_info.corners if circuit_info is not None else None)
+    pos_v_lap_graphs(lap_matrix, driver_stats, abvs, selected)
+    speed_comp(driver_stats, abvs, selected)
+
+@st.fragment
+@profiled_fragment
+def driver_v_driver_section(lap_matrix, drivers, driver_stats, circuit_info):
+    set_driver_v_driver(lap_matrix, drivers, driver_stats, circuit_info)
+
+@profiling.timed()
+def drivers_selection(drivers):
     st.header("Driver vs Driver Comparision")
-    col1,col2 = st.columns(2)
-    drivers = race_results['FullName'].unique()
-    with col1:
-        first_selected_driver = st.selectbox("Select 1st Driver", drivers)
-        st.session_state['first_driver'] = first_selected_driver
-    with col2:
-        second_selected_driver = st.selectbox("Select 2nd Driver", drivers, index=1)
-        st.session_state['second_driver'] = second_selected_driver
-    
+    drivers = list(drivers)
+    selected = st.multiselect("Select Drivers", drivers, default=drivers[:2], key='compare_drivers')
+    st.divider()
+    return selected
+
+@profiling.timed()
+def race_result_comp(drivers, driver_stats, selected):
+    # Two drivers per row, each with their photo next to their numbers
+    for row_start in range(0, len(selected), 2):
+        columns = st.columns([2, 3, 2, 3])
+        for i, driver in enumerate(selected[row_start:row_start + 2]):
+            abv = drivers[driver]['Abbreviation']
+            with columns[2 * i]:
+                st.image(retrive_driver_img(driver), use_column_width=True)
+            with columns[2 * i + 1]:
+                st.subheader(f"{driver}")
+                st.metric(label="Final Position", value=int(drivers[driver]['Position']))
+                st.metric(label="Fastest Lap Time", value=convert_to_time_format(driver_stats.at[abv, 'LapTime_min']))
+                st.metric(label="Average Lap Time", value=convert_to_time_format(driver_stats.at[abv, 'LapTime_mean']))
     st.divider()
-    
-def race_result_comp(laps, race_results):
-    first_driver = st.session_state['first_driver']
-    second_driver = st.session_state['second_driver']
-    
-    first_driver_abv = race_results.loc[race_results['FullName'] == first_driver, 'Abbreviation'].iloc[0]
-    second_driver_abv = race_results.loc[race_results['FullName'] == second_driver, 'Abbreviation'].iloc[0]
-    
-    st.session_state['first_driver_abv'] = first_driver_abv
-    st.session_state['second_driver_abv'] = second_driver_abv
-
-    col1, col2, col3, col4 = st.columns([2,3,2,3])
-    
-    with col1:
-        st.image(retrive_driver_img(first_driver), use_column_width=True)
 
-    with col2:
-        final_pos_dri_1 = int(race_results.loc[race_results['Abbreviation'] == first_driver_abv, 'Position'].iloc[0])
-        fastest_dri_1 = convert_to_time_format(laps.loc[laps['Driver'] == first_driver_abv, 'LapTime'].min().total_seconds())
-        avg_dri_1 = convert_to_time_format(laps.loc[laps['Driver'] == first_driver_abv, 'LapTime'].mean().total_seconds())
-
-        st.subheader(f"{first_driver}")
-        st.metric(label="Final Position", value=final_pos_dri_1)
-        st.metric(label="Fastest Lap Time", value=fastest_dri_1)
-        st.metric(label="Average Lap Time", value=avg_dri_1)
-    
-    with col3:
-        st.image(retrive_driver_img(second_driver), use_column_width=True)
+def lap_v_lap_tables(lap_matrix, abvs, names):
+    lap_times = lap_matrix.frame('LapTime', abvs)
 
-    with col4:
-        final_pos_dri_2 = int(race_results.loc[race_results['Abbreviation'] == second_driver_abv, 'Position'].iloc[0])
-        fastest_dri_2 = convert_to_time_format(laps.loc[laps['Driver'] == second_driver_abv, 'LapTime'].min().total_seconds())
-        avg_dri_2 = convert_to_time_format(laps.loc[laps['Driver'] == second_driver_abv, 'LapTime'].mean().total_seconds())
-
-        st.subheader(f"{second_driver}")
-        st.metric(label="Final Position", value=final_pos_dri_2)
-        st.metric(label="Fastest Lap Time", value=fastest_dri_2)
-        st.metric(label="Average Lap Time", value=avg_dri_2)
-    st.divider()
+    lap_df = pd.DataFrame({name: format_lap_times(lap_times[abv]) for abv, name in zip(abvs, names)},
+                          index=pd.Index(lap_times.index, name='Lap Number'))
+    for abv in abvs[1:]:
+        lap_df[f'{abvs[0]} - {abv}'] = (lap_times[abvs[0]] - lap_times[abv]).to_numpy()
 
-def lap_v_lap(laps):
-    dri_1_abv = st.session_state['first_driver_abv']
-    dri_2_abv = st.session_state['second_driver_abv']
-    
-    dri_1_laps = laps[laps['Driver'] == dri_1_abv].copy()
-    dri_2_laps = laps[laps['Driver'] == dri_2_abv].copy()
-
-    merged_laps = pd.merge(
-        dri_1_laps[['LapNumber', 'LapTime']],
-        dri_2_laps[['LapNumber', 'LapTime']],
-        on='LapNumber',
-        suffixes=(f'_{dri_1_abv}', f'_{dri_2_abv}'),
-        how='outer' 
-    )
+    fig = line_figure(lap_times.reset_index(), 'LapNumber', list(abvs), x_title='Lap Number', y_title='Lap Time (s)')
+    return lap_df, fig
+
+@profiling.timed()
+def lap_v_lap(lap_matrix, abvs, names):
     st.header("Lap v Lap Analysis")
+    lap_df, fig = section_data('lap_v_lap', abvs, lambda: lap_v_lap_tables(lap_matrix, abvs, names))
+
     col1 , col2 = st.columns([2,5])
     with col1:
-        lap_df = pd.DataFrame({
-            'Lap Number': merged_laps['LapNumber'],
-            st.session_state['first_driver']: merged_laps[f'LapTime_{dri_1_abv}'].apply(lambda x: convert_to_time_format(x.total_seconds()) if pd.notnull(x) else 'N/A'),
-            st.session_state['second_driver']: merged_laps[f'LapTime_{dri_2_abv}'].apply(lambda x: convert_to_time_format(x.total_seconds()) if pd.notnull(x) else 'N/A'),
-        })
-
-        lap_df['Time Difference'] = (merged_laps[f'LapTime_{dri_1_abv}'] - merged_laps[f'LapTime_{dri_2_abv}']).dt.total_seconds()
-
-        lap_df.set_index('Lap Number', inplace=True)
         st.dataframe(lap_df, use_container_width=True)
     with col2:
-        fig = px.line(merged_laps, x='LapNumber', y=[f'LapTime_{dri_1_abv}',f'LapTime_{dri_2_abv}'])
-        st.plotly_chart(fig)
+        plotly_chart(fig)
     st.divider()
 
-def pos_v_lap_graphs(laps):
-    dri_1_abv = st.session_state['first_driver_abv']
-    dri_2_abv = st.session_state['second_driver_abv']
+def delta_tables(dri_1_abv, dri_2_abv, corners, index):
+    year, grand_prix, session_type = st.session_state['race_key']
+    columns = ['Distance', 'Time']
+    telemetry_1, offsets_1 = telemetry_store.driver_telemetry(year, grand_prix, dri_1_abv, session_type, columns=columns, index=index)
+    telemetry_2, offsets_2 = telemetry_store.driver_telemetry(year, grand_prix, dri_2_abv, session_type, columns=columns, index=index)
+    return delta_time(telemetry_1, offsets_1, telemetry_2, offsets_2, corners=corners)
+
+def delta_chart(delta, lap_pos, dri_1_abv, dri_2_abv):
+    fig = go.Figure()
+    fig.add_trace(line_trace(delta['distance'], delta['delta'][lap_pos], f'{dri_2_abv} - {dri_1_abv}'))
+    if delta['corner_distance'] is not None:
+        fig.add_trace(go.Scatter(x=delta['corner_distance'], y=np.zeros(len(delta['corner_distance'])), mode='markers+text',
+                                 text=list(delta['corner_delta'].columns), textposition='top center', name='Corners'))
+    fig.update_layout(xaxis_title='Distance (m)', yaxis_title=f'Gap of {dri_2_abv} to {dri_1_abv} (s)', showlegend=False)
+    return fig
+
+@st.fragment
+@profiled_fragment
+def delta_comp(dri_1_abv, dri_2_abv, corners):
+    # Changing the lap only reruns this chart; the delta for every lap is computed once per driver pair
+    st.header("Delta Time")
+    year, grand_prix, session_type = st.session_state['race_key']
+    index = telemetry_store.telemetry_index(year, grand_prix, session_type)
+    if index is None or not {dri_1_abv, dri_2_abv} <= set(index['Driver']):
+        st.write("Store telemetry for this race (Show telemetry under the selected driver) to compare the two drivers along the lap.")
+        st.divider()
+        return
 
-    dri_1_laps = laps[laps['Driver'] == dri_1_abv].copy()
-    dri_2_laps = laps[laps['Driver'] == dri_2_abv].copy()
+    delta = section_data('delta_time', (dri_1_abv, dri_2_abv), lambda: delta_tables(dri_1_abv, dri_2_abv, corners, index))
+    if not len(delta['laps']):
+        st.write("No lap with telemetry for both drivers.")
+        st.divider()
+        return
+
+    laps = [int(lap) for lap in delta['laps']]
+    lap = st.selectbox("Select Lap", laps, key='delta_lap')
+    lap_pos = laps.index(lap)
+
+    col1, col2 = st.columns([5, 3])
+    with col1:
+        fig = section_data('delta_chart', (dri_1_abv, dri_2_abv, lap), lambda: delta_chart(delta, lap_pos, dri_1_abv, dri_2_abv))
+        plotly_chart(fig)
+    with col2:
+        if delta['corner_delta'] is not None:
+            corner_df = pd.DataFrame({'Corner': delta['corner_delta'].columns,
+                                      'Time Difference': delta['corner_delta'].iloc[lap_pos].to_numpy()}).set_index('Corner')
+            st.dataframe(corner_df, use_container_width=True)
+        else:
+            st.write("Circuit information not available")
+    st.divider()
 
+def position_comp_tables(lap_matrix, abvs, names):
+    positions = lap_matrix.frame('Position', abvs)
+    fig = line_figure(positions.reset_index(), 'LapNumber', list(abvs), x_title='Lap Number', y_title='Position',
+                      reverse_y=True)
+
+    # First and last lap each driver has a position for, so a missing final lap falls back to the one before.
+    # A driver with no classified position at all (DNS, all-NaN laps) gets <NA> instead of failing the int cast.
+    def whole(values):
+        return pd.array(np.trunc(values), dtype='Int64')
+
+    start_position = positions.bfill().iloc[0].to_numpy() if len(positions) else np.full(len(abvs), np.nan)
+    end_position = positions.ffill().iloc[-1].to_numpy() if len(positions) else np.full(len(abvs), np.nan)
+    analysis_df = pd.DataFrame({
+        'Start Position': whole(start_position),
+        'End Position': whole(end_position),
+        'Position Change': whole(start_position - end_position),
+        'Average Position': whole(positions.mean().to_numpy()),
+    }, index=list(names))
+    analysis_df.columns.name = 'Metric'
+    return fig, analysis_df
+
+@profiling.timed()
+def pos_v_lap_graphs(lap_matrix, driver_stats, abvs, names):
     col1 , col2 = st.columns(2)
     with col1:
         st.header("Position v Lap Analysis")
-        mergered_pos = pd.merge(
-            dri_1_laps[['LapNumber', 'Position']],
-            dri_2_laps[['LapNumber', 'Position']],
-            on='LapNumber',
-            suffixes=(f'_{dri_1_abv}', f'_{dri_2_abv}'),
-            how='outer' 
-        )
-        fig = px.line(mergered_pos, x='LapNumber', y=[f'Position_{dri_1_abv}',f'Position_{dri_2_abv}'])
-        fig.update_yaxes(autorange='reversed')
-        st.plotly_chart(fig)
+        fig, analysis_df = section_data('position_comp', abvs, lambda: position_comp_tables(lap_matrix, abvs, names))
+        plotly_chart(fig)
 
         st.write("")
         st.header("Position Analysis")
-
-        start_position_dri_1 = int(dri_1_laps['Position'].iloc[0])
-        start_position_dri_2 = int(dri_2_laps['Position'].iloc[0])
-
-        try:
-            end_position_dri_1 = int(dri_1_laps['Position'].iloc[-1])
-            end_position_dri_2 = int(dri_2_laps['Position'].iloc[-1])
-        except ValueError:
-            end_position_dri_1 = int(dri_1_laps['Position'].iloc[-2])
-            end_position_dri_2 = int(dri_2_laps['Position'].iloc[-2])
-
-        pos_gained_dr_1 = start_position_dri_1 - end_position_dri_1
-        pos_gained_dr_2 = start_position_dri_2 - end_position_dri_2
-
-        avg_position_dri_1 = int(dri_1_laps['Position'].mean())
-        avg_position_dri_2 = int(dri_2_laps['Position'].mean())
-
-        analysis_data = {
-            "Metric": ["Start Position", "End Position", "Position Change", "Average Position"],
-            st.session_state['first_driver']: [start_position_dri_1, end_position_dri_1, pos_gained_dr_1, avg_position_dri_1],
-            st.session_state['second_driver']: [start_position_dri_2, end_position_dri_2, pos_gained_dr_2, avg_position_dri_2]
-        }
-
-        analysis_df = pd.DataFrame(analysis_data).set_index('Metric').T
         st.dataframe(analysis_df, use_container_width=True)
     with col2:
-        st.header("Sector Time per Lap")
-        sector_choice = st.selectbox("Select Sector", options=[1, 2, 3], format_func=lambda x: f"Sector {x}")
-        merged_sector_times = pd.merge(
-            dri_1_laps[['LapNumber', f'Sector{sector_choice}Time']],
-            dri_2_laps[['LapNumber', f'Sector{sector_choice}Time']],
-            on='LapNumber',
-            suffixes=(f'_{dri_1_abv}', f'_{dri_2_abv}'),
-            how='outer'
-        )
+        sector_comp(lap_matrix, driver_stats, abvs)
+    st.divider()
+
+def sector_comp_tables(lap_matrix, driver_stats, abvs, sector_choice):
+    sector_times = lap_matrix.frame(f'Sector{sector_choice}Time', abvs)
+    fig = line_figure(sector_times.reset_index(), 'LapNumber', list(abvs), x_title='Lap Number', y_title='Sector Time (s)')
 
-        fig = px.line(
-            merged_sector_times,
-            x='LapNumber',
-            y=[f'Sector{sector_choice}Time_{dri_1_abv}', f'Sector{sector_choice}Time_{dri_2_abv}'],
-            labels={'value': 'Sector Time', 'LapNumber': 'Lap Number'}
+    sector_data = {
+        'Metric': [f'Fastest Time {abv}' for abv in abvs] + [f'Slowest Time {abv}' for abv in abvs]
+    }
+    for col in ['Sector1Time', 'Sector2Time', 'Sector3Time']:
+        sector_data[col] = format_lap_times(
+            driver_stats.loc[list(abvs), [f'{col}_min', f'{col}_max']].to_numpy(dtype=float).T.ravel()
         )
-        st.plotly_chart(fig)
-
-        sector_data = {
-            'Metric' : [f'Fastest Time {dri_1_abv}', f'Fastest Time {dri_2_abv}',f'Slowest Time {dri_1_abv}',f'Slowest Time {dri_2_abv}'],
-            'Sector1Time' : [convert_to_time_format(dri_1_laps['Sector1Time'].min().total_seconds()), 
-                             convert_to_time_format(dri_2_laps['Sector1Time'].min().total_seconds()),
-                             convert_to_time_format(dri_1_laps['Sector1Time'].max().total_seconds()),
-                             convert_to_time_format(dri_2_laps['Sector1Time'].max().total_seconds())],
-            'Sector2Time' : [convert_to_time_format(dri_1_laps['Sector2Time'].min().total_seconds()),
-                             convert_to_time_format(dri_2_laps['Sector2Time'].min().total_seconds()),
-                             convert_to_time_format(dri_1_laps['Sector2Time'].max().total_seconds()),
-                             convert_to_time_format(dri_2_laps['Sector2Time'].max().total_seconds())],
-            'Sector3Time' : [convert_to_time_format(dri_1_laps['Sector3Time'].min().total_seconds()),
-                             convert_to_time_format(dri_2_laps['Sector3Time'].min().total_seconds()),
-                             convert_to_time_format(dri_1_laps['Sector3Time'].max().total_seconds()),
-                             convert_to_time_format(dri_2_laps['Sector3Time'].max().total_seconds())]
-        }
 
-        sector_df = pd.DataFrame(sector_data).set_index('Metric').T
+    sector_df = pd.DataFrame(sector_data).set_index('Metric').T
+    return fig, sector_df
 
-        st.dataframe(sector_df, use_container_width=True)
-    st.divider()
+@st.fragment
+@profiled_fragment
+def sector_comp(lap_matrix, driver_stats, abvs):
+    # Changing the sector only reruns this chart
+    st.header("Sector Time per Lap")
+    sector_choice = st.selectbox("Select Sector", options=[1, 2, 3], format_func=lambda x: f"Sector {x}")
+    fig, sector_df = section_data('sector_comp', (*abvs, sector_choice), lambda: sector_comp_tables(
+        lap_matrix, driver_stats, abvs, sector_choice
+    ))
+    plotly_chart(fig)
+    st.dataframe(sector_df, use_container_width=True)
+
+def speed_comp_tables(driver_stats, abvs, names):
+    stats = driver_stats.loc[list(abvs)]
 
-def speed_comp(laps):
-    st.header("Speed Analysis")
-    driver1_data = laps[laps['Driver'] == st.session_state['first_driver_abv']]
-    driver2_data = laps[laps['Driver'] == st.session_state['second_driver_abv']]
-    
     speed_metrics = {
-        'Max Speed Sector1': [driver1_data['SpeedI1'].max(), driver2_data['SpeedI1'].max()],
-        'Avg Speed Sector 1': [int(driver1_data['SpeedI1'].mean()), int(driver2_data['SpeedI1'].mean())],
-        'Max Speed Sector 2': [driver1_data['SpeedI2'].max(), driver2_data['SpeedI2'].max()],
-        'Avg Speed Sector 2': [int(driver1_data['SpeedI2'].mean()), int(driver2_data['SpeedI2'].mean())],
-        'Max Speed Finish Line': [driver1_data['SpeedFL'].max(), driver2_data['SpeedFL'].max()],
-        'Avg Speed Finish Line': [int(driver1_data['SpeedFL'].mean()), int(driver2_data['SpeedFL'].mean())]
+        'Max Speed Sector1': stats['SpeedI1_max'].to_numpy(),
+        'Avg Speed Sector 1': stats['SpeedI1_mean'].to_numpy().astype(int),
+        'Max Speed Sector 2': stats['SpeedI2_max'].to_numpy(),
+        'Avg Speed Sector 2': stats['SpeedI2_mean'].to_numpy().astype(int),
+        'Max Speed Finish Line': stats['SpeedFL_max'].to_numpy(),
+        'Avg Speed Finish Line': stats['SpeedFL_mean'].to_numpy().astype(int),
     }
 
-    speed_df = pd.DataFrame(speed_metrics, index=[st.session_state['first_driver'], st.session_state['second_driver']]).T.reset_index()
-    speed_df.columns = ['Metric', f'{st.session_state['first_driver_abv']} Speed (km/h)', f'{st.session_state['second_driver_abv']} Speed (km/h)']
+    speed_df = pd.DataFrame(speed_metrics, index=list(names)).T.reset_index()
+    speed_columns = [f'{abv} Speed (km/h)' for abv in abvs]
+    speed_df.columns = ['Metric'] + speed_columns
+
+    for abv, col in zip(abvs[1:], speed_columns[1:]):
+        speed_df[f'Difference {abvs[0]} - {abv} (km/h)'] = speed_df[speed_columns[0]] - speed_df[col]
 
-    speed_df['Difference (km/h)'] = speed_df[f'{st.session_state["first_driver_abv"]} Speed (km/h)'] - speed_df[f'{st.session_state["second_driver_abv"]} Speed (km/h)']
-    
-    fig = px.bar(speed_df, x='Metric', y=[f'{st.session_state['first_driver_abv']} Speed (km/h)', f'{st.session_state['second_driver_abv']} Speed (km/h)'],
+    fig = px.bar(speed_df, x='Metric', y=speed_columns,
                  title="Speed Comparison",
                  labels={'value': 'Speed (km/h)', 'Metric': 'Metrics'},
                  barmode='group')
+    return fig, speed_df.set_index('Metric')
+
+@profiling.timed()
+def speed_comp(driver_stats, abvs, names):
+    st.header("Speed Analysis")
+    fig, speed_df = section_data('speed_comp', abvs, lambda: speed_comp_tables(driver_stats, abvs, names))
 
     col1, col2 = st.columns([5,3])
-    
+
     with col1:
-        st.plotly_chart(fig)
-    
+        plotly_chart(fig)
+
     with col2:
         st.subheader("Speed Metrics DataFrame")
-        speed_df = speed_df.set_index('Metric')
         st.dataframe(speed_df, use_container_width=True)
-    
+
     st.divider()
 
-def race_summary(race_results, laps):
+REPLAY_STEP_SECONDS = float(os.environ.get('F1_REPLAY_STEP', 0.5))
+
+def replay_state(laps):
+    # One engine per session; moving forward pushes only the new laps, moving back starts again from lap 1
+    state = st.session_state.get('replay')
+    if state is None or state['race_key'] != st.session_state['race_key']:
+        batches = list(lap_batches(laps))
+        state = {'race_key': st.session_state['race_key'], 'batches': batches,
+                 'last_lap': int(batches[-1]['LapNumber'][0]) if batches else 0}
+        st.session_state['replay'] = state
+        st.session_state['replay_lap'] = 1
+        reset_replay(state)
+    return state
+
+def reset_replay(state):
+    state['engine'] = RaceReplay(sorted({driver for batch in state['batches'] for driver in batch['Driver']}))
+    state['pushed'] = 0
+
+def replay_to(state, lap):
+    if state['engine'].lap > lap:
+        reset_replay(state)
+    batches = state['batches']
+    while state['pushed'] < len(batches) and batches[state['pushed']]['LapNumber'][0] <= lap:
+        state['engine'].push(batches[state['pushed']])
+        state['pushed'] += 1
+    return state['engine']
+
+def step_replay(step):
+    state = st.session_state['replay']
+    st.session_state['replay_lap'] = min(max(st.session_state['replay_lap'] + step, 1), state['last_lap'])
+
+def render_replay(placeholder, engine, last_lap):
+    standings = engine.standings()
+    standings_df = pd.DataFrame({
+        'Position': standings['Position'].astype('Int64'),
+        'Gap': [f"+{gap:.3f}" if gap > 0 else ('Leader' if gap == 0 else '') for gap in standings['Gap']],
+        'Interval': [f"+{interval:.3f}" if interval == interval else '' for interval in standings['Interval']],
+        'Laps': standings['Laps'],
+        'Tyre': [f"{compound} ({tyre_life:.0f})" if compound else '' for compound, tyre_life in
+                 zip(standings['Compound'], standings['TyreLife'])],
+        'Places Gained': standings['PlacesGained'].astype('Int64'),
+    }, index=standings.index)
+
+    with placeholder.container():
+        st.subheader(f"Lap {engine.lap} of {last_lap}")
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            st.dataframe(standings_df, use_container_width=True)
+        with col2:
+            st.write("**Race Events**")
+            st.dataframe(engine.race_events(), use_container_width=True, hide_index=True)
+            pit_stops = engine.pit_stop_table()
+            st.write(f"**Pit Stops** ({len(pit_stops)})")
+            st.dataframe(pit_stops[['LapNumber', 'Duration']].iloc[::-1], use_container_width=True)
+
+@st.fragment
+@profiled_fragment
+def race_replay_section(laps):
+    st.header("Race Replay")
+    if not st.toggle("Replay the race lap by lap", key='show_replay'):
+        st.divider()
+        return
+
+    state = replay_state(laps)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.button("Previous lap", on_click=step_replay, args=(-1,))
+    col2.button("Next lap", on_click=step_replay, args=(1,))
+    play = col3.button("Play to the flag")
+    col4.button("Restart", on_click=step_replay, args=(-state['last_lap'],))
+
+    placeholder = st.empty()
+    if play:
+        for lap in range(st.session_state['replay_lap'], state['last_lap'] + 1):
+            st.session_state['replay_lap'] = lap
+            render_replay(placeholder, replay_to(state, lap), state['last_lap'])
+            time.sleep(REPLAY_STEP_SECONDS)
+    else:
+        render_replay(placeholder, replay_to(state, st.session_state['replay_lap']), state['last_lap'])
+    st.divider()
+
+@profiling.timed()
+def race_summary(race_results, race_leaders, driver_names):
     st.header("Race Summary")
+    most_successful_team, team_driver, most_places_driver = section_data('race_summary', (), lambda: summary_leaders(race_results))
     st.divider()
-    race_sum_res = race_results.copy()
 
     col1, col2 , col3, col4  = st.columns(4)
 
     with col3:
         st.subheader('Most Successful Team')
-
-        team_points = race_sum_res.groupby('TeamName')['Points'].sum().reset_index()
-        most_successful_team = team_points.loc[team_points['Points'].idxmax()]
-
-        team_drivers = race_sum_res[race_sum_res['TeamName'] == most_successful_team['TeamName']]['FullName'].unique()
-        
-        st.image(retrive_driver_img(team_drivers[0]))
+        st.image(retrive_driver_img(team_driver))
         st.subheader(f"**{most_successful_team['TeamName']}**")
         st.write(f"**Total Points: {most_successful_team['Points']}**")
 
     with col2:
         st.subheader('Most Places Gained')
-    
-        race_sum_res['pos_gained'] = race_sum_res['GridPosition'] - race_sum_res['Position']
-        most_places_index =  race_sum_res['pos_gained'].idxmax()
-        most_places_driver = race_sum_res.loc[most_places_index]
-        
         st.image(retrive_driver_img(most_places_driver['FullName']))
 
         st.subheader(f"**{most_places_driver['FullName']}**")
@@ -740,12 +1058,11 @@ def race_summary(race_results, laps):
     with col1:
         st.subheader('Fastest Lap')
 
-        fastest_lap_code = laps.loc[laps['LapTime'] == laps['LapTime'].min(), 'Driver'].iloc[0] 
-        fastest_lap_driver = race_results.loc[race_results['Abbreviation'] == fastest_lap_code, 'FullName'].iloc[0]
+        fastest_lap = race_leaders['fastest_lap']
+        fastest_lap_driver = driver_names[fastest_lap['Driver']]
         st.image(retrive_driver_img(fastest_lap_driver))
-        fastest_lap_time = laps['LapTime'].min()
-        fastest_lap_time_lap = laps.loc[laps['LapTime'] == fastest_lap_time, 'LapNumber'].iloc[0]
-        fastest_formatted_time = convert_to_time_format(fastest_lap_time.total_seconds())
+        fastest_lap_time_lap = fastest_lap['LapNumber']
+        fastest_formatted_time = convert_to_time_format(fastest_lap['LapTime'])
 
         st.subheader(f"**{fastest_lap_driver}**")
         st.write(f"**Lap Number: {int(fastest_lap_time_lap)}({fastest_formatted_time})**")
@@ -753,17 +1070,12 @@ def race_summary(race_results, laps):
     with col4:
         st.subheader('Top Speed')
 
-        speed_cols = laps[['SpeedI1','SpeedI2','SpeedFL','SpeedST']].copy()
-        
-        max_index = speed_cols.stack().idxmax()
+        top_speed = race_leaders['top_speed']
+        highest_speed_driver = driver_names[top_speed['Driver']]
 
-        highest_speed_row = laps.loc[max_index[0]]
-        highest_speed_driver = race_results.loc[race_results['Abbreviation'] == highest_speed_row['Driver'], 'FullName'].iloc[0]
-        
         st.image(retrive_driver_img(highest_speed_driver))
         st.subheader(highest_speed_driver)
-        highest_speed_value = highest_speed_row[max_index[1]]
-        st.write(f"**Lap Number: {int(highest_speed_row['LapNumber'])} ({highest_speed_value} km/h)**")
+        st.write(f"**Lap Number: {int(top_speed['LapNumber'])} ({top_speed['Speed']} km/h)**")
 
     st.divider()
 
@@ -774,39 +1086,45 @@ def race_summary(race_results, laps):
 
 
 def display_race_info():
-    race = st.session_state['race_data']['race']
-    session_info = st.session_state['race_data']['session_info']
-    race_results = st.session_state['race_data']['race_results']
-    race_weather = st.session_state['race_data']['weather_data']
-    laps = st.session_state['race_data']['laps']
+    st.session_state['page_payload'] = {}
+    race_data = load_race_data(st.session_state['race_key'])
+    get_asset_store().prefetch_race(race_data)
+    total_laps = race_data['total_laps']
+    session_info = race_data['session_info']
+    race_results = race_data['race_results']
+    race_weather = race_data['weather_data']
+    laps = race_data['laps']
+    circuit_info = race_data['circuit_info']
+    lap_index = race_data['lap_index']
+    drivers = race_data['drivers']
+    driver_stats = race_data['driver_stats']
 
-    time_columns = ['Time','LapTime', 'Sector1Time', 'Sector2Time', 
-                    'Sector3Time', 'Sector1SessionTime', 
-                    'Sector2SessionTime', 'Sector3SessionTime', 'PitOutTime', 'PitInTime']
+    set_race_name_flag(session_info)
+    set_race_info_results(session_info, total_laps, race_results, race_weather, laps, circuit_info)
+    set_race_events(race_data['lap_status'], race_data['race_events'])
+    set_race_conditions(laps)
+    set_pit_stop_leaderboard(race_data['pit_stops'], race_data['driver_names'])
+    set_race_trace(race_data['lap_matrix'])
+    driver_section(lap_index, drivers, driver_stats, race_data['stints'], race_data['tyre_compounds'], race_data['pit_stops'],
+                   session_info)
+    driver_v_driver_section(race_data['lap_matrix'], drivers, driver_stats, circuit_info)
+    race_replay_section(laps)
+    race_summary(race_results, race_data['race_leaders'], race_data['driver_names'])
 
-    laps[time_columns] = laps[time_columns].apply(pd.to_timedelta, errors='coerce')
-    
-    circuit_info = st.session_state['race_data']['circuit_info']
+    payload = st.session_state['page_payload']
+    st.caption(f"Chart payload: {sum(payload.values()) / 1024:.1f} KB across {sum(1 for size in payload.values() if size)} sections")
 
-    set_race_name_flag(session_info)
-    set_race_info_results(session_info, race, race_results, race_weather, laps, circuit_info)
-    set_race_events(laps)
-    set_driver_selection(race_results)
-    set_lap_wise_analysis(laps, race_results)
-    set_driver_speed(laps, race_results)
-    set_driver_v_driver(laps,race_results)
-    race_summary(race_results, laps)
-    
 
 def main():
 
     set_page_config()
 
-    if 'race_data' not in st.session_state:
-        retrive_choice_race()
+    with profiled_run('page'):
+        if 'race_key' not in st.session_state:
+            retrive_choice_race()
 
-    if 'race_data' in st.session_state:
-        display_race_info()
+        if 'race_key' in st.session_state:
+            display_race_info()
 
 
 
@@ -0,0 +1,140 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+PROFILE_ENV = 'F1_PROFILE'
+PROFILE_LOG = os.environ.get('F1_PROFILE_LOG', 'profile_log.jsonl')
+
+_current = contextvars.ContextVar('profile', default=None)
+_log_lock = threading.Lock()
+_off = nullcontext()
+
+
+def enabled_by_env():
+    return os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+
+class Profile:
+    # Spans and counters of one script run; worker threads add to it through the copied context
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+        self.counters = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **fields):
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.spans.append({'name': name, 'ms': round(elapsed, 3), 'depth': depth,
+                                   'start_ms': round((start - self.start) * 1000, 3), **fields})
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def merge(self, spans, counters, started):
+        # Spans timed in another process, nested under the current span; started is when they began on our clock
+        depth = getattr(self._local, 'depth', 0)
+        offset = (started - self.start) * 1000
+        with self._lock:
+            for span in spans:
+                self.spans.append(dict(span, depth=span['depth'] + depth, start_ms=round(span['start_ms'] + offset, 3)))
+            self.counters.update(counters)
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self.start) * 1000, 3)
+
+    def totals(self):
+        # Time and calls per span name; nested spans are also inside their parent's time
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span['name'], {'calls': 0, 'ms': 0.0})
+            entry['calls'] += 1
+            entry['ms'] = round(entry['ms'] + span['ms'], 3)
+        return totals
+
+    def record(self, extra=None):
+        return {
+            'ts': self.started_at,
+            'run': self.name,
+            'total_ms': self.total_ms,
+            'totals': self.totals(),
+            'counters': dict(self.counters),
+            'spans': self.spans,
+            **(extra or {}),
+        }
+
+
+def active():
+    return _current.get()
+
+
+@contextmanager
+def run(name):
+    profile = Profile(name)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.finish()
+
+
+def span(name, **fields):
+    # A shared no-op context when nothing is being profiled, so the hot path only pays for one lookup
+    profile = _current.get()
+    if profile is None:
+        return _off
+    return profile.span(name, **fields)
+
+
+def count(name, value=1):
+    profile = _current.get()
+    if profile is not None:
+        profile.count(name, value)
+
+
+def merge(spans, counters, started):
+    profile = _current.get()
+    if profile is not None:
+        profile.merge(spans, counters, started)
+
+
+def timed(name=None):
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            with profile.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_log(profile, path=PROFILE_LOG, extra=None):
+    line = json.dumps(profile.record(extra), default=str)
+    with _log_lock:
+        with open(path, 'a') as f:
+            f.write(line + '\n')
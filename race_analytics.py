@@ -0,0 +1,503 @@
+import numpy as np
+import pandas as pd
+
+
+def float_values(series):
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+class LapIndex:
+    # Laps sorted by (Driver, LapNumber) with per-driver row offsets, so a driver slice is a positional view
+
+    def __init__(self, laps, offsets=None):
+        # offsets: the driver offsets of laps that are already sorted (see race_store.load_prepared), used as they are
+        if offsets is not None:
+            self.laps = laps
+            self.offsets = offsets
+            return
+        self.laps = laps.sort_values(['Driver', 'LapNumber'], kind='stable').reset_index(drop=True)
+
+        drivers = self.laps['Driver'].to_numpy(dtype=object)
+        if len(drivers):
+            starts = np.flatnonzero(np.r_[True, drivers[1:] != drivers[:-1]])
+        else:
+            starts = np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(drivers)].astype(int)
+        self.offsets = {drivers[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+    def driver_laps(self, abbreviation):
+        start, stop = self.offsets.get(abbreviation, (0, 0))
+        return self.laps.iloc[start:stop]
+
+    def drivers(self):
+        return list(self.offsets)
+
+
+def build_driver_lookup(race_results):
+    records = race_results.to_dict('records')
+    drivers = {record['FullName']: record for record in records}
+    driver_names = {record['Abbreviation']: record['FullName'] for record in records}
+    return drivers, driver_names
+
+
+TRACK_STATUS = {
+    1: 'Track clear',
+    2: 'Yellow flag',
+    4: 'Safety Car',
+    5: 'Red Flag',
+    6: 'Virtual Safety Car',
+    7: 'Virtual Safety Car ending'
+}
+NEUTRALISED_MASK = (1 << 4) | (1 << 5) | (1 << 6) | (1 << 7)
+# Yellow flags slow the lap too, so they are also kept out of the tyre degradation fits
+DEGRADATION_MASK = NEUTRALISED_MASK | (1 << 2)
+
+
+def decode_track_status(track_status):
+    # Multi-digit codes such as '2671' become one bit per status digit; only the few unique codes are parsed
+    codes, inverse = np.unique(track_status.astype(str).to_numpy(), return_inverse=True)
+    code_masks = np.array(
+        [sum(1 << int(digit) for digit in set(code) if digit.isdigit() and int(digit) in TRACK_STATUS) for code in codes],
+        dtype=np.uint8
+    )
+    return pd.Series(code_masks[inverse.reshape(-1)], index=track_status.index, name='TrackStatusMask')
+
+
+def green_flag_mask(laps, mask=NEUTRALISED_MASK):
+    return (laps['TrackStatusMask'].to_numpy() & mask) == 0
+
+
+def lap_track_status(laps):
+    # Race-wide status per lap number: union of every driver's status on that lap
+    lap_numbers = float_values(laps['LapNumber'])
+    valid = ~np.isnan(lap_numbers)
+    lap_numbers = lap_numbers[valid].astype(int)
+    if not len(lap_numbers):
+        return pd.Series([], index=pd.Index([], name='LapNumber'), name='TrackStatusMask', dtype=np.uint8)
+
+    masks = np.zeros(lap_numbers.max() + 1, dtype=np.uint8)
+    np.bitwise_or.at(masks, lap_numbers, laps['TrackStatusMask'].to_numpy()[valid])
+    present = np.zeros(len(masks), dtype=bool)
+    present[lap_numbers] = True
+
+    lap_index = pd.Index(np.flatnonzero(present), name='LapNumber')
+    return pd.Series(masks[present], index=lap_index, name='TrackStatusMask')
+
+
+def track_status_intervals(lap_status):
+    lap_numbers = lap_status.index.to_numpy()
+    masks = lap_status.to_numpy()
+    intervals = []
+    for bit, status in TRACK_STATUS.items():
+        active = ((masks >> bit) & 1).astype(np.int8)
+        edges = np.diff(np.r_[0, active, 0])
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        intervals.append(pd.DataFrame({
+            'Status': status,
+            'StartLap': lap_numbers[starts],
+            'EndLap': lap_numbers[ends],
+        }))
+
+    events = pd.concat(intervals, ignore_index=True)
+    return events.sort_values(['StartLap', 'EndLap'], kind='stable').reset_index(drop=True)
+
+
+TIME_STAT_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time']
+SPEED_COLUMNS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+
+
+def _first_row_matching(values, targets, starts, lengths):
+    rows = np.arange(len(values))[:, None]
+    matches = np.where(values == np.repeat(targets, lengths, axis=0), rows, len(values))
+    return np.minimum.reduceat(matches, starts, axis=0)
+
+
+def driver_stats(lap_index, drivers=None):
+    # One reduction over the driver-sorted laps: min/mean/max/sum plus the lap numbers of the min and max.
+    # Drivers passed in without a lap (DNS, out on lap 1) get a row of NaN after the drivers with laps.
+    laps = lap_index.laps
+    columns = TIME_STAT_COLUMNS + SPEED_COLUMNS
+    index = pd.Index(lap_index.drivers(), name='Driver')
+    if index.empty:
+        return pd.DataFrame(index=index)
+
+    values = np.column_stack(
+        [laps[col].dt.total_seconds().to_numpy(dtype=float) for col in TIME_STAT_COLUMNS] +
+        [float_values(laps[col]) for col in SPEED_COLUMNS]
+    )
+    lap_numbers = np.append(float_values(laps['LapNumber']), np.nan)
+    starts = np.array([start for start, _ in lap_index.offsets.values()])
+    lengths = np.array([stop - start for start, stop in lap_index.offsets.values()])
+
+    present = ~np.isnan(values)
+    counts = np.add.reduceat(present, starts, axis=0)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    mins = np.fmin.reduceat(values, starts, axis=0)
+    maxs = np.fmax.reduceat(values, starts, axis=0)
+    min_rows = _first_row_matching(values, mins, starts, lengths)
+    max_rows = _first_row_matching(values, maxs, starts, lengths)
+
+    stats = {}
+    if 'TrackStatusMask' in laps:
+        green = present[:, 0] & green_flag_mask(laps)
+        green_counts = np.add.reduceat(green, starts)
+        green_sums = np.add.reduceat(np.where(green, values[:, 0], 0.0), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['LapTime_green_mean'] = np.where(green_counts > 0, green_sums / green_counts, np.nan)
+
+    for i, col in enumerate(columns):
+        stats[f'{col}_min'] = mins[:, i]
+        stats[f'{col}_mean'] = means[:, i]
+        stats[f'{col}_max'] = maxs[:, i]
+        stats[f'{col}_sum'] = sums[:, i]
+        stats[f'{col}_min_lap'] = lap_numbers[min_rows[:, i]]
+        stats[f'{col}_max_lap'] = lap_numbers[max_rows[:, i]]
+
+    stats = pd.DataFrame(stats, index=index)
+    if drivers is not None:
+        stats = stats.reindex(index.append(pd.Index(drivers, name='Driver').difference(index, sort=False)))
+    return stats
+
+
+def race_leaders(stats):
+    leaders = {'fastest_lap': None, 'top_speed': None}
+    if stats.empty:
+        return leaders
+
+    lap_times = stats['LapTime_min']
+    if lap_times.notna().any():
+        driver = lap_times.idxmin()
+        leaders['fastest_lap'] = {
+            'Driver': driver,
+            'LapNumber': stats.at[driver, 'LapTime_min_lap'],
+            'LapTime': lap_times[driver],
+        }
+
+    top_speeds = stats[[f'{col}_max' for col in SPEED_COLUMNS]]
+    if top_speeds.notna().any().any():
+        speed_col = top_speeds.max().idxmax()
+        driver = top_speeds[speed_col].idxmax()
+        leaders['top_speed'] = {
+            'Driver': driver,
+            'LapNumber': stats.at[driver, speed_col.replace('_max', '_max_lap')],
+            'Speed': top_speeds.at[driver, speed_col],
+            'SpeedTrap': speed_col.replace('_max', ''),
+        }
+
+    return leaders
+
+
+def driver_rows(frame, abbreviation):
+    # Frames indexed by a sorted Driver index can be sliced with two binary searches
+    start = frame.index.searchsorted(abbreviation, side='left')
+    stop = frame.index.searchsorted(abbreviation, side='right')
+    return frame.iloc[start:stop]
+
+
+# Lap time gained per lap of fuel burnt, so every lap is compared as if run on the final lap's fuel load
+FUEL_EFFECT = 0.03
+MIN_FIT_LAPS = 3
+
+
+def degradation_laps(laps):
+    # Laps that say something about tyre wear: timed laps without yellow/SC/VSC, no pit in/out, not deleted, not lap 1
+    usable = laps['LapTime'].notna().to_numpy() & laps['TyreLife'].notna().to_numpy()
+    usable &= laps['PitInTime'].isna().to_numpy() & laps['PitOutTime'].isna().to_numpy()
+    usable &= float_values(laps['LapNumber']) > 1
+    if 'Deleted' in laps:
+        usable &= ~laps['Deleted'].fillna(False).to_numpy(dtype=bool)
+    if 'TrackStatusMask' in laps:
+        usable &= green_flag_mask(laps, DEGRADATION_MASK)
+    return usable
+
+
+def stint_degradation(laps, starts, fuel_effect=FUEL_EFFECT):
+    # Fuel-corrected lap time = base pace + deg rate * tyre life, for every stint at once: the 2x2 normal
+    # equations of all stints come from one reduceat pass and are solved as one batch
+    lap_numbers = float_values(laps['LapNumber'])
+    corrected = laps['LapTime'].dt.total_seconds().to_numpy(dtype=float)
+    corrected = corrected - fuel_effect * (np.nanmax(lap_numbers) - lap_numbers)
+    tyre_life = float_values(laps['TyreLife'])
+
+    usable = degradation_laps(laps)
+    x = np.where(usable, tyre_life, 0.0)
+    y = np.where(usable, corrected, 0.0)
+    n = np.add.reduceat(usable.astype(float), starts)
+    sx = np.add.reduceat(x, starts)
+    sy = np.add.reduceat(y, starts)
+    sxx = np.add.reduceat(x * x, starts)
+    sxy = np.add.reduceat(x * y, starts)
+
+    # Stints need a few laps and more than one tyre age to fit a slope
+    fit = (n >= MIN_FIT_LAPS) & (n * sxx - sx * sx > 1e-9)
+    normal = np.stack([np.stack([n, sx], axis=-1), np.stack([sx, sxx], axis=-1)], axis=-2)[fit]
+    rhs = np.stack([sy, sxy], axis=-1)[fit]
+
+    base_pace = np.full(len(starts), np.nan)
+    deg_rate = np.full(len(starts), np.nan)
+    if fit.any():
+        solution = np.linalg.solve(normal, rhs[..., None])[..., 0]
+        base_pace[fit] = solution[:, 0]
+        deg_rate[fit] = solution[:, 1]
+    return n.astype(int), deg_rate, base_pace
+
+
+def stint_table(lap_index):
+    laps = lap_index.laps
+    n = len(laps)
+    columns = ['Stint', 'Compound', 'StartLap', 'EndLap', 'Laps', 'StartTyreLife', 'EndTyreLife', 'FitLaps',
+               'DegRate', 'BasePace']
+    if not n:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='Driver'))
+
+    drivers = laps['Driver'].to_numpy(dtype=object)
+    stints = float_values(laps['Stint'])
+    compounds = laps['Compound'].astype(object).fillna('UNKNOWN').to_numpy()
+    lap_numbers = float_values(laps['LapNumber'])
+    tyre_life = float_values(laps['TyreLife'])
+
+    # A stint starts on a new driver, a new Stint number or a compound change
+    changed = np.ones(n, dtype=bool)
+    changed[1:] = ((drivers[1:] != drivers[:-1]) |
+                   ~((stints[1:] == stints[:-1]) | (np.isnan(stints[1:]) & np.isnan(stints[:-1]))) |
+                   (compounds[1:] != compounds[:-1]))
+    starts = np.flatnonzero(changed)
+    ends = np.r_[starts[1:], n] - 1
+    fit_laps, deg_rate, base_pace = stint_degradation(laps, starts)
+
+    return pd.DataFrame({
+        'Stint': stints[starts],
+        'Compound': compounds[starts],
+        'StartLap': lap_numbers[starts],
+        'EndLap': lap_numbers[ends],
+        'Laps': ends - starts + 1,
+        'StartTyreLife': tyre_life[starts],
+        'EndTyreLife': tyre_life[ends],
+        'FitLaps': fit_laps,
+        'DegRate': deg_rate,
+        'BasePace': base_pace,
+    }, index=pd.Index(drivers[starts], name='Driver'))
+
+
+def compound_degradation(stints):
+    # Deg rate averaged over the laps each stint was fitted on, base pace as the median over stints
+    fitted = stints[stints['DegRate'].notna()]
+    weighted = (fitted['DegRate'] * fitted['FitLaps']).groupby(fitted['Compound']).sum()
+    grouped = fitted.groupby('Compound')
+    return pd.DataFrame({
+        'Stints': grouped.size(),
+        'Laps': grouped['FitLaps'].sum(),
+        'DegRate': weighted / grouped['FitLaps'].sum(),
+        'BasePace': grouped['BasePace'].median(),
+    })
+
+
+def pit_stop_table(lap_index):
+    # Pair each PitInTime with the PitOutTime of the same driver's next lap
+    laps = lap_index.laps
+    drivers = laps['Driver'].to_numpy(dtype=object)
+    pit_out_next = laps['PitOutTime'].shift(-1)
+    same_driver_next = np.r_[drivers[1:] == drivers[:-1], False]
+    pit_out_next = pit_out_next.where(same_driver_next)
+
+    pitted = laps['PitInTime'].notna().to_numpy()
+    pit_stops = pd.DataFrame({
+        'LapNumber': float_values(laps['LapNumber'])[pitted],
+        'PitInTime': laps['PitInTime'].to_numpy()[pitted],
+        'PitOutTime': pit_out_next.to_numpy()[pitted],
+    }, index=pd.Index(drivers[pitted], name='Driver'))
+    pit_stops['Duration'] = (pit_stops['PitOutTime'] - pit_stops['PitInTime']).dt.total_seconds()
+    return pit_stops
+
+
+MATRIX_TIME_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time']
+
+
+class LapMatrix:
+    # LapNumber x Driver arrays for the whole field, built once per race; comparisons slice columns instead of merging
+
+    def __init__(self, lap_index, drivers=None, values=None):
+        # values: the arrays of an earlier build (see race_store.load_prepared), with drivers in their column order
+        if values is not None:
+            self.drivers = list(drivers)
+            self.columns = {driver: i for i, driver in enumerate(self.drivers)}
+            self.lap_numbers = np.arange(1, len(values['LapTime']) + 1)
+            self.values = values
+            return
+
+        # Drivers passed in without a lap (DNS, out on lap 1) get all-NaN columns after the drivers with laps
+        laps = lap_index.laps
+        self.drivers = lap_index.drivers()
+        self.drivers += [driver for driver in dict.fromkeys(drivers if drivers is not None else [])
+                         if driver not in lap_index.offsets]
+        self.columns = {driver: i for i, driver in enumerate(self.drivers)}
+
+        lap_numbers = float_values(laps['LapNumber']) if len(laps) else np.array([])
+        valid = ~np.isnan(lap_numbers)
+        n_laps = int(lap_numbers[valid].max()) if valid.any() else 0
+        self.lap_numbers = np.arange(1, n_laps + 1)
+
+        lengths = [stop - start for start, stop in lap_index.offsets.values()]
+        rows = lap_numbers[valid].astype(int) - 1
+        cols = np.repeat(np.arange(len(lengths)), lengths)[valid]
+
+        def matrix(values):
+            out = np.full((n_laps, len(self.drivers)), np.nan)
+            out[rows, cols] = values[valid]
+            return out
+
+        self.values = {col: matrix(laps[col].dt.total_seconds().to_numpy(dtype=float)) for col in MATRIX_TIME_COLUMNS}
+        self.values['Position'] = matrix(float_values(laps['Position']))
+
+        # Race time at the end of each lap, counted from the moment the first lap started
+        lap_end = laps['Time'].dt.total_seconds().to_numpy(dtype=float)
+        lap_start = laps['LapStartTime'].dt.total_seconds().to_numpy(dtype=float)
+        race_start = np.nanmin(lap_start[valid][rows == 0]) if (rows == 0).any() else np.nan
+        self.values['RaceTime'] = matrix(lap_end - race_start)
+
+        race_time = self.values['RaceTime']
+        with np.errstate(invalid='ignore'):
+            has_time = ~np.isnan(race_time).all(axis=1, keepdims=True)
+            leader_time = np.where(has_time, np.nanmin(np.where(has_time, race_time, 0.0), axis=1, keepdims=True), np.nan)
+        self.values['GapToLeader'] = race_time - leader_time
+        self.values['Interval'] = interval_to_car_ahead(race_time)
+        self.values['RaceTrace'] = race_trace(race_time, self.values['Position'])
+
+    def frame(self, column, drivers=None):
+        drivers = self.drivers if drivers is None else list(drivers)
+        values = self.values[column][:, [self.columns[driver] for driver in drivers]]
+        return pd.DataFrame(values, index=pd.Index(self.lap_numbers, name='LapNumber'), columns=drivers)
+
+
+def interval_to_car_ahead(race_time):
+    # Sort every lap by race time once, diff along the sorted rows and scatter the gaps back to their drivers
+    order = np.argsort(np.where(np.isnan(race_time), np.inf, race_time), axis=1)
+    ordered = np.take_along_axis(race_time, order, axis=1)
+    gaps = np.full(race_time.shape, np.nan)
+    gaps[:, 1:] = np.diff(ordered, axis=1)
+    interval = np.empty(race_time.shape)
+    np.put_along_axis(interval, order, gaps, axis=1)
+    return interval
+
+
+def race_trace(race_time, positions):
+    # Time ahead of (positive) or behind the winner's average lap pace after every lap
+    if not race_time.size:
+        return race_time.copy()
+    laps_done = np.arange(1, race_time.shape[0] + 1)
+    final_position = positions[-1]
+    winners = np.flatnonzero(final_position == 1)
+    if len(winners):
+        winner_time = race_time[:, winners[0]]
+        finished = ~np.isnan(winner_time)
+        pace = winner_time[finished][-1] / laps_done[finished][-1] if finished.any() else np.nan
+    else:
+        pace = np.nanmedian(race_time[-1]) / len(laps_done)
+    return laps_done[:, None] * pace - race_time
+
+
+WEATHER_COLUMNS = ['AirTemp', 'TrackTemp', 'Humidity', 'WindSpeed', 'Rainfall']
+
+
+def lap_weather(laps, weather):
+    # As-of join for the whole field at once: each lap gets the last weather sample taken before its midpoint
+    columns = {}
+    present = [col for col in WEATHER_COLUMNS if weather is not None and col in weather]
+    if not present or weather.empty:
+        return pd.DataFrame(columns, index=laps.index)
+
+    weather = weather.sort_values('Time', kind='stable')
+    sample_time = weather['Time'].to_numpy(dtype='timedelta64[ns]').astype(np.int64)
+    lap_start = laps['LapStartTime'].to_numpy(dtype='timedelta64[ns]')
+    lap_end = laps['Time'].to_numpy(dtype='timedelta64[ns]')
+    midpoint = np.where(np.isnat(lap_start), lap_end, lap_start + (lap_end - lap_start) // 2)
+
+    known = ~np.isnat(midpoint)
+    sample = np.searchsorted(sample_time, midpoint.astype(np.int64), side='right') - 1
+    known &= sample >= 0
+    sample = np.where(known, sample, 0)
+
+    for col in present:
+        if col == 'Rainfall':
+            values = weather[col].fillna(False).to_numpy(dtype=bool)
+            columns[col] = pd.arrays.BooleanArray(values[sample], ~known)
+        else:
+            values = weather[col].to_numpy(dtype=np.float64)
+            columns[col] = np.where(known, values[sample], np.nan).astype(np.float32)
+    return pd.DataFrame(columns, index=laps.index)
+
+
+def lap_conditions(laps):
+    # Race timeline of the conditions: field median per lap number, and whether any car was on that lap in the rain
+    lap_numbers = laps['LapNumber']
+    conditions = laps[[col for col in ['AirTemp', 'TrackTemp'] if col in laps]].groupby(lap_numbers).median()
+    if 'Rainfall' in laps:
+        conditions['Rainfall'] = laps['Rainfall'].fillna(False).astype(bool).groupby(lap_numbers).any()
+    conditions.index.name = 'LapNumber'
+    return conditions
+
+
+def rain_intervals(conditions):
+    if 'Rainfall' not in conditions:
+        return pd.DataFrame({'StartLap': [], 'EndLap': []})
+    raining = conditions['Rainfall'].to_numpy(dtype=np.int8)
+    lap_numbers = conditions.index.to_numpy()
+    edges = np.diff(np.r_[0, raining, 0])
+    return pd.DataFrame({
+        'StartLap': lap_numbers[np.flatnonzero(edges == 1)],
+        'EndLap': lap_numbers[np.flatnonzero(edges == -1) - 1],
+    })
+
+
+def prepare_race_data(race_data):
+    laps = race_data['laps'].drop(columns=WEATHER_COLUMNS, errors='ignore')
+    lap_index = LapIndex(laps.join(lap_weather(laps, race_data.get('weather_data'))))
+    race_data['laps'] = lap_index.laps
+    race_data['lap_index'] = lap_index
+    race_data['drivers'], race_data['driver_names'] = build_driver_lookup(race_data['race_results'])
+    race_data['driver_stats'] = driver_stats(lap_index, race_data['race_results']['Abbreviation'])
+    race_data['race_leaders'] = race_leaders(race_data['driver_stats'])
+    race_data['lap_status'] = lap_track_status(lap_index.laps)
+    race_data['race_events'] = track_status_intervals(race_data['lap_status'])
+    race_data['stints'] = stint_table(lap_index)
+    race_data['tyre_compounds'] = compound_degradation(race_data['stints'])
+    race_data['pit_stops'] = pit_stop_table(lap_index)
+    race_data['lap_matrix'] = LapMatrix(lap_index, race_data['race_results']['Abbreviation'])
+    return race_data
+
+
+def restore_race_data(race_data):
+    # Race data whose tables were prepared elsewhere (see race_store.load_prepared): the sorted laps, their offsets and
+    # the lap matrix arrays come with it, so the lookups only wrap them
+    lap_index = LapIndex(race_data['laps'], race_data.pop('lap_offsets'))
+    race_data['lap_index'] = lap_index
+    race_data['drivers'], race_data['driver_names'] = build_driver_lookup(race_data['race_results'])
+    race_data['race_leaders'] = race_leaders(race_data['driver_stats'])
+    race_data['lap_matrix'] = LapMatrix(lap_index, race_data.pop('matrix_drivers'), race_data.pop('matrix_values'))
+    return race_data
+
+
+def weather_summary(weather):
+    return {
+        'AirTemp': weather['AirTemp'].mean(),
+        'WindSpeed': weather['WindSpeed'].mean(),
+        'TrackTemp': weather['TrackTemp'].mean(),
+        'Humidity': weather['Humidity'].mean(),
+        'RainShare': weather['Rainfall'].astype(bool).mean(),
+    }
+
+
+def summary_leaders(race_results):
+    # (most successful team row, one of its drivers, row of the driver who gained most places)
+    team_points = race_results.groupby('TeamName')['Points'].sum().reset_index()
+    most_successful_team = team_points.loc[team_points['Points'].idxmax()]
+    team_drivers = race_results[race_results['TeamName'] == most_successful_team['TeamName']]['FullName'].unique()
+
+    pos_gained = race_results['GridPosition'] - race_results['Position']
+    most_places_driver = race_results.loc[pos_gained.idxmax()].copy()
+    most_places_driver['pos_gained'] = pos_gained.max()
+
+    return most_successful_team, team_drivers[0], most_places_driver
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def value_size(value, seen):
+    # Objects reachable from several places (LapIndex.laps is race_data['laps']) are only counted once
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(value_size(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        # LapIndex, LapMatrix, CircuitInfo
+        return value_size(vars(value), seen)
+    return 0
+
+
+def race_data_size(race_data):
+    return value_size(race_data, set())
+
+
+class RaceCache:
+    # Shared by every session in the process, so cached race data must be treated as read-only
+
+    def __init__(self, max_bytes, sizeof=race_data_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = threading.Event()
+                    self._loading[key] = pending
+                    self.misses += 1
+                    break
+
+            # Another session is already loading this race, wait for it and look again
+            pending.wait()
+
+        try:
+            value = loader()
+            size = self.sizeof(value)
+            with self._lock:
+                self._insert(key, value, size)
+        finally:
+            with self._lock:
+                del self._loading[key]
+            pending.set()
+
+        return value
+
+    def _insert(self, key, value, size):
+        while self._entries and self.current_bytes + size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
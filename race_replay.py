@@ -0,0 +1,279 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from lap_schema import normalize_laps
+from race_analytics import (DEGRADATION_MASK, FUEL_EFFECT, MIN_FIT_LAPS, SPEED_COLUMNS, TRACK_STATUS,
+                            float_values)
+
+SAMPLE_LAPS = 'Sample Data/laps.csv'
+TIME_COLUMNS = ['Time', 'LapStartTime', 'LapTime', 'PitInTime', 'PitOutTime']
+STINT_COLUMNS = ['Stint', 'Compound', 'StartLap', 'EndLap', 'Laps', 'StartTyreLife', 'EndTyreLife', 'FitLaps',
+                 'DegRate', 'BasePace']
+
+
+def seconds(values):
+    return values.dt.total_seconds().to_numpy(dtype=float)
+
+
+def lap_batches(laps):
+    # The laps cut into one batch per lap number, as a live feed would deliver them; columns become arrays once
+    laps = laps.sort_values(['LapNumber', 'Driver'], kind='stable')
+    lap_numbers = float_values(laps['LapNumber'])
+    laps = laps[~np.isnan(lap_numbers)]
+    lap_numbers = lap_numbers[~np.isnan(lap_numbers)].astype(int)
+
+    columns = {
+        'Driver': laps['Driver'].astype(str).to_numpy(dtype=object),
+        'LapNumber': lap_numbers,
+        'Position': float_values(laps['Position']),
+        'Stint': float_values(laps['Stint']),
+        'Compound': laps['Compound'].astype(object).fillna('UNKNOWN').to_numpy(),
+        'TyreLife': float_values(laps['TyreLife']),
+        'TrackStatusMask': (laps['TrackStatusMask'].to_numpy(dtype=np.uint8) if 'TrackStatusMask' in laps
+                            else np.zeros(len(laps), dtype=np.uint8)),
+        'Deleted': (laps['Deleted'].fillna(False).to_numpy(dtype=bool) if 'Deleted' in laps
+                    else np.zeros(len(laps), dtype=bool)),
+    }
+    for col in TIME_COLUMNS:
+        columns[col] = seconds(laps[col])
+    for col in SPEED_COLUMNS:
+        columns[col] = float_values(laps[col])
+
+    starts = np.flatnonzero(np.r_[True, lap_numbers[1:] != lap_numbers[:-1]]) if len(lap_numbers) else []
+    stops = np.r_[starts[1:], len(lap_numbers)].astype(int)
+    for start, stop in zip(starts, stops):
+        yield {col: values[start:stop] for col, values in columns.items()}
+
+
+class RaceReplay:
+    # Race state that moves forward one lap at a time; every update only touches the drivers on that lap
+
+    def __init__(self, drivers=()):
+        self.slots = {}
+        self.drivers = []
+        self.capacity = 0
+        self.lap = 0
+        self.race_start = np.nan
+
+        self.race_time = np.empty(0)
+        self.laps_done = np.empty(0, dtype=int)
+        self.position = np.empty(0)
+        self.start_position = np.empty(0)
+        self.gap = np.empty(0)
+        self.interval = np.empty(0)
+
+        self.stints = []
+        self.open_stint = {}
+        self.pit_stops = []
+        self.pending_pit = {}
+        self.events = []
+        self.open_events = {}
+        self.fastest_lap = None
+        self.top_speed = None
+
+        for driver in drivers:
+            self._slot(driver)
+
+    def _slot(self, driver):
+        slot = self.slots.get(driver)
+        if slot is None:
+            slot = len(self.drivers)
+            if slot == self.capacity:
+                self._grow(max(2 * self.capacity, 24))
+            self.slots[driver] = slot
+            self.drivers.append(driver)
+        return slot
+
+    def _grow(self, capacity):
+        def grown(values, fill):
+            out = np.full(capacity, fill, dtype=values.dtype)
+            out[:len(values)] = values
+            return out
+
+        self.race_time = grown(self.race_time, np.nan)
+        self.laps_done = grown(self.laps_done, 0)
+        self.position = grown(self.position, np.nan)
+        self.start_position = grown(self.start_position, np.nan)
+        self.gap = grown(self.gap, np.nan)
+        self.interval = grown(self.interval, np.nan)
+        self.capacity = capacity
+
+    def push(self, batch):
+        lap = int(batch['LapNumber'][0])
+        slots = np.array([self._slot(driver) for driver in batch['Driver']], dtype=int)
+        if np.isnan(self.race_start):
+            self.race_start = np.nanmin(batch['LapStartTime']) if np.isfinite(batch['LapStartTime']).any() else 0.0
+
+        self.lap = lap
+        self.race_time[slots] = batch['Time'] - self.race_start
+        self.laps_done[slots] = lap
+        self.position[slots] = batch['Position']
+        first_position = np.isnan(self.start_position[slots])
+        self.start_position[slots[first_position]] = batch['Position'][first_position]
+
+        # Gap and interval among the cars that have just completed this lap
+        race_time = self.race_time[slots]
+        order = np.argsort(np.where(np.isnan(race_time), np.inf, race_time))
+        ordered = race_time[order]
+        self.gap[slots] = race_time - ordered[0]
+        interval = np.full(len(order), np.nan)
+        interval[1:] = np.diff(ordered)
+        self.interval[slots[order]] = interval
+
+        self._update_stints(lap, batch)
+        self._update_pit_stops(lap, batch)
+        self._update_events(lap, np.bitwise_or.reduce(batch['TrackStatusMask']))
+        self._update_leaders(lap, batch)
+        return self
+
+    def _update_stints(self, lap, batch):
+        # Same lap filter as race_analytics.degradation_laps; each stint keeps running sums for its fit
+        usable = np.isfinite(batch['LapTime']) & np.isfinite(batch['TyreLife']) & (lap > 1)
+        usable &= np.isnan(batch['PitInTime']) & np.isnan(batch['PitOutTime']) & ~batch['Deleted']
+        usable &= (batch['TrackStatusMask'] & DEGRADATION_MASK) == 0
+
+        for driver, stint, compound, tyre_life, lap_time, fit in zip(batch['Driver'], batch['Stint'],
+                                                                      batch['Compound'], batch['TyreLife'],
+                                                                      batch['LapTime'], usable):
+            current = self.open_stint.get(driver)
+            same_stint = current is not None and current['Compound'] == compound and (
+                current['Stint'] == stint or (np.isnan(current['Stint']) and np.isnan(stint)))
+            if same_stint:
+                current['EndLap'] = lap
+                current['Laps'] += 1
+                current['EndTyreLife'] = tyre_life
+            else:
+                current = {'Driver': driver, 'Stint': stint, 'Compound': compound, 'StartLap': lap, 'EndLap': lap,
+                           'Laps': 1, 'StartTyreLife': tyre_life, 'EndTyreLife': tyre_life,
+                           'FitLaps': 0, 'sx': 0.0, 'sy': 0.0, 'sxx': 0.0, 'sxy': 0.0}
+                self.stints.append(current)
+                self.open_stint[driver] = current
+
+            if fit:
+                # Fuel correction without knowing the race length: y + FUEL_EFFECT * last lap is added at the end
+                y = lap_time + FUEL_EFFECT * lap
+                current['FitLaps'] += 1
+                current['sx'] += tyre_life
+                current['sy'] += y
+                current['sxx'] += tyre_life * tyre_life
+                current['sxy'] += tyre_life * y
+
+    def _update_pit_stops(self, lap, batch):
+        # A stop is complete once the driver's next lap brings its PitOutTime
+        for driver, pit_in, pit_out in zip(batch['Driver'], batch['PitInTime'], batch['PitOutTime']):
+            pending = self.pending_pit.pop(driver, None)
+            if pending is not None:
+                pending['PitOutTime'] = pit_out
+                pending['Duration'] = pit_out - pending['PitInTime']
+            if not np.isnan(pit_in):
+                stop = {'Driver': driver, 'LapNumber': lap, 'PitInTime': pit_in, 'PitOutTime': np.nan, 'Duration': np.nan}
+                self.pit_stops.append(stop)
+                self.pending_pit[driver] = stop
+
+    def _update_events(self, lap, mask):
+        for bit, status in TRACK_STATUS.items():
+            active = bool((int(mask) >> bit) & 1)
+            event = self.open_events.get(bit)
+            if active and event is None:
+                event = {'Status': status, 'StartLap': lap, 'EndLap': lap}
+                self.events.append(event)
+                self.open_events[bit] = event
+            elif active:
+                event['EndLap'] = lap
+            elif event is not None:
+                del self.open_events[bit]
+
+    def _update_leaders(self, lap, batch):
+        lap_times = batch['LapTime']
+        if np.isfinite(lap_times).any():
+            row = int(np.nanargmin(lap_times))
+            if self.fastest_lap is None or lap_times[row] < self.fastest_lap['LapTime']:
+                self.fastest_lap = {'Driver': batch['Driver'][row], 'LapNumber': lap, 'LapTime': lap_times[row]}
+
+        speeds = np.column_stack([batch[col] for col in SPEED_COLUMNS])
+        if np.isfinite(speeds).any():
+            row, col = np.unravel_index(np.nanargmax(speeds), speeds.shape)
+            if self.top_speed is None or speeds[row, col] > self.top_speed['Speed']:
+                self.top_speed = {'Driver': batch['Driver'][row], 'LapNumber': lap, 'Speed': speeds[row, col],
+                                  'SpeedTrap': SPEED_COLUMNS[col]}
+
+    def standings(self):
+        n = len(self.drivers)
+        standings = pd.DataFrame({
+            'Position': self.position[:n],
+            'Laps': self.laps_done[:n],
+            'RaceTime': self.race_time[:n],
+            'Gap': self.gap[:n],
+            'Interval': self.interval[:n],
+            'Compound': [self.open_stint[driver]['Compound'] if driver in self.open_stint else None
+                         for driver in self.drivers],
+            'TyreLife': [self.open_stint[driver]['EndTyreLife'] if driver in self.open_stint else np.nan
+                         for driver in self.drivers],
+            'PlacesGained': self.start_position[:n] - self.position[:n],
+        }, index=pd.Index(self.drivers, name='Driver'))
+        return standings.sort_values(['Position', 'Laps', 'RaceTime'], ascending=[True, False, True])
+
+    def stint_table(self):
+        # The columns of race_analytics.stint_table, with the fits solved from each stint's sums so far
+        stints = pd.DataFrame(self.stints, columns=['Driver', *STINT_COLUMNS[:8], 'sx', 'sy', 'sxx', 'sxy'])
+        for col in ['StartLap', 'EndLap']:
+            stints[col] = stints[col].astype(float)
+
+        n = stints['FitLaps'].to_numpy(dtype=float)
+        sx, sxx = stints['sx'].to_numpy(), stints['sxx'].to_numpy()
+        shift = FUEL_EFFECT * self.lap
+        sy = stints['sy'].to_numpy() - shift * n
+        sxy = stints['sxy'].to_numpy() - shift * sx
+        determinant = n * sxx - sx * sx
+        fit = (n >= MIN_FIT_LAPS) & (determinant > 1e-9)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stints['DegRate'] = np.where(fit, (n * sxy - sx * sy) / determinant, np.nan)
+            stints['BasePace'] = np.where(fit, (sxx * sy - sx * sxy) / determinant, np.nan)
+
+        stints = stints.sort_values(['Driver', 'StartLap'], kind='stable').set_index('Driver')
+        return stints[STINT_COLUMNS]
+
+    def pit_stop_table(self):
+        pit_stops = pd.DataFrame(self.pit_stops, columns=['Driver', 'LapNumber', 'PitInTime', 'PitOutTime', 'Duration'])
+        pit_stops = pit_stops.sort_values(['Driver', 'LapNumber'], kind='stable').set_index('Driver')
+        pit_stops['LapNumber'] = pit_stops['LapNumber'].astype(float)
+        for col in ['PitInTime', 'PitOutTime']:
+            pit_stops[col] = pd.to_timedelta(pit_stops[col], unit='s')
+        return pit_stops
+
+    def race_events(self):
+        events = pd.DataFrame(self.events, columns=['Status', 'StartLap', 'EndLap'])
+        return events.sort_values(['StartLap', 'EndLap'], kind='stable').reset_index(drop=True)
+
+
+def replay(laps, on_lap=None):
+    engine = RaceReplay(sorted(laps['Driver'].astype(str).unique()))
+    for batch in lap_batches(laps):
+        engine.push(batch)
+        if on_lap is not None:
+            on_lap(engine)
+    return engine
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3:
+        import fastf1
+        import race_store
+
+        fastf1.Cache.enable_cache('FastF1_cache')
+        laps = race_store.get_race(sys.argv[1], sys.argv[2])['laps']
+    else:
+        laps = normalize_laps(pd.read_csv(SAMPLE_LAPS))
+
+    timings = []
+    engine = RaceReplay(sorted(laps['Driver'].astype(str).unique()))
+    for batch in lap_batches(laps):
+        start = time.perf_counter()
+        engine.push(batch)
+        timings.append(time.perf_counter() - start)
+
+    print(engine.standings().head(10).to_string())
+    print(f"\n{len(timings)} laps replayed, median {np.median(timings) * 1e6:.0f} us per lap")
@@ -0,0 +1,252 @@
+import errno
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import fastf1
+from fastf1.mvapi import CircuitInfo
+
+import profiling
+from lap_schema import frame_bytes, normalize_laps
+
+STORE_DIR = 'race_store'
+STORE_VERSION = 2
+
+RACE_FRAMES = {
+    'laps': 'laps',
+    'race_results': 'results',
+    'weather_data': 'weather_data',
+}
+CIRCUIT_FRAMES = ['corners', 'marshal_lights', 'marshal_sectors']
+
+# Tables computed by prepare_race_data, stored with the index they are read back with; bump the version when they change.
+# The laps are stored sorted by driver, and the LapMatrix arrays flattened into MATRIX_FILE, so neither is rebuilt on read.
+PREPARED_DIR = 'prepared'
+PREPARED_VERSION = 4
+MATRIX_FILE = 'lap_matrix.arrow'
+PREPARED_FRAMES = {
+    'laps': None,
+    'driver_stats': 'Driver',
+    'lap_status': 'LapNumber',
+    'race_events': None,
+    'stints': 'Driver',
+    'tyre_compounds': 'Compound',
+    'pit_stops': 'Driver',
+}
+
+
+def race_key(year, grand_prix, session_type='R'):
+    return (int(year), str(grand_prix), str(session_type))
+
+
+def race_dir(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    slug = str(grand_prix).strip().replace(' ', '_')
+    return os.path.join(store_dir, str(int(year)), f"{slug}_{session_type}")
+
+
+def write_frame(df, path):
+    # Uncompressed Arrow IPC so the file can be memory-mapped on read
+    table = pa.Table.from_pandas(pd.DataFrame(df), preserve_index=False)
+    feather.write_feather(table, path, compression='uncompressed')
+
+
+def read_frame(path):
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+@contextmanager
+def atomic_dir(target):
+    # Yields a scratch directory next to target and swaps it in when the block succeeds, so readers never see a
+    # partial directory. os.replace only overwrites an empty directory, and another writer can put its copy in place
+    # at any moment, so whatever is there is moved aside until the swap goes through: the last writer wins.
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(target)}_", dir=parent)
+    old_dir = None
+    try:
+        yield tmp_dir
+        for attempt in itertools.count():
+            try:
+                os.replace(tmp_dir, target)
+                break
+            except OSError as e:
+                if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    raise
+            if old_dir is None:
+                old_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(target)}_old_", dir=parent)
+            try:
+                os.rename(target, os.path.join(old_dir, str(attempt)))
+            except FileNotFoundError:
+                pass
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_session(year, grand_prix, session_type='R'):
+    race = fastf1.get_session(int(year), grand_prix, session_type)
+    with profiling.span('race.load', race=f"{year} {grand_prix} {session_type}"):
+        race.load(laps=True, telemetry=False, weather=True, messages=False)
+    return race
+
+
+def session_to_race_data(race):
+    try:
+        circuit_info = race.get_circuit_info()
+    except Exception:
+        circuit_info = None
+
+    return {
+        'session_info': race.session_info,
+        'race_results': race.results,
+        'weather_data': race.weather_data if race.weather_data is not None else None,
+        'laps': race.laps,
+        'circuit_info': circuit_info,
+        'total_laps': race.total_laps,
+    }
+
+
+def ingest_race_data(race_data, year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    target = race_dir(year, grand_prix, session_type, store_dir)
+    with atomic_dir(target) as tmp_dir:
+        laps = normalize_laps(race_data['laps'])
+        frames = dict(race_data, laps=laps)
+        for key, name in RACE_FRAMES.items():
+            if frames.get(key) is not None:
+                write_frame(frames[key], os.path.join(tmp_dir, f"{name}.arrow"))
+
+        circuit_info = race_data.get('circuit_info')
+        if circuit_info is not None:
+            for name in CIRCUIT_FRAMES:
+                write_frame(getattr(circuit_info, name), os.path.join(tmp_dir, f"circuit_{name}.arrow"))
+
+        meta = {
+            'version': STORE_VERSION,
+            'year': int(year),
+            'grand_prix': grand_prix,
+            'session_type': session_type,
+            'total_laps': race_data.get('total_laps'),
+            'laps_bytes': frame_bytes(laps),
+            'session_info': race_data['session_info'],
+            'circuit_rotation': circuit_info.rotation if circuit_info is not None else None,
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, default=str)
+    return target
+
+
+def ingest_race(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    race = load_session(year, grand_prix, session_type)
+    race_data = session_to_race_data(race)
+    ingest_race_data(race_data, year, grand_prix, session_type, store_dir)
+    return race_data
+
+
+def load_race(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    source = race_dir(year, grand_prix, session_type, store_dir)
+    meta_path = os.path.join(source, 'meta.json')
+    if not os.path.isfile(meta_path):
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('version') != STORE_VERSION:
+        return None
+
+    race_data = {
+        'session_info': meta['session_info'],
+        'total_laps': meta['total_laps'],
+    }
+    for key, name in RACE_FRAMES.items():
+        path = os.path.join(source, f"{name}.arrow")
+        race_data[key] = read_frame(path) if os.path.isfile(path) else None
+
+    race_data['circuit_info'] = None
+    if meta.get('circuit_rotation') is not None:
+        race_data['circuit_info'] = CircuitInfo(
+            rotation=meta['circuit_rotation'],
+            **{name: read_frame(os.path.join(source, f"circuit_{name}.arrow")) for name in CIRCUIT_FRAMES}
+        )
+
+    return race_data
+
+
+def write_prepared(race_data, year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    source = race_dir(year, grand_prix, session_type, store_dir)
+    target = os.path.join(source, PREPARED_DIR)
+    with atomic_dir(target) as tmp_dir:
+        for key, index in PREPARED_FRAMES.items():
+            frame = race_data[key].reset_index() if index is not None else race_data[key]
+            write_frame(frame, os.path.join(tmp_dir, f"{key}.arrow"))
+
+        lap_matrix = race_data['lap_matrix']
+        write_frame({column: values.ravel() for column, values in lap_matrix.values.items()},
+                    os.path.join(tmp_dir, MATRIX_FILE))
+        meta = {
+            'version': PREPARED_VERSION,
+            'lap_offsets': race_data['lap_index'].offsets,
+            'matrix_drivers': lap_matrix.drivers,
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+    return target
+
+
+def load_prepared(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    # The stored race with its prepared tables memory-mapped, or None when they have not been written for this version
+    source = os.path.join(race_dir(year, grand_prix, session_type, store_dir), PREPARED_DIR)
+    try:
+        with open(os.path.join(source, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != PREPARED_VERSION:
+        return None
+
+    race_data = load_race(year, grand_prix, session_type, store_dir)
+    if race_data is None:
+        return None
+    for key, index in PREPARED_FRAMES.items():
+        frame = read_frame(os.path.join(source, f"{key}.arrow"))
+        race_data[key] = frame.set_index(index) if index is not None else frame
+    race_data['lap_status'] = race_data['lap_status']['TrackStatusMask']
+
+    race_data['lap_offsets'] = {driver: tuple(offsets) for driver, offsets in meta['lap_offsets'].items()}
+    drivers = race_data['matrix_drivers'] = meta['matrix_drivers']
+    matrix = read_frame(os.path.join(source, MATRIX_FILE))
+    n_laps = len(matrix) // len(drivers) if drivers else 0
+    race_data['matrix_values'] = {column: matrix[column].to_numpy().reshape(n_laps, len(drivers))
+                                  for column in matrix.columns}
+    return race_data
+
+
+def get_race(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    race_data = load_race(year, grand_prix, session_type, store_dir)
+    if race_data is None:
+        ingest_race(year, grand_prix, session_type, store_dir)
+        race_data = load_race(year, grand_prix, session_type, store_dir)
+    return race_data
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python race_store.py <year> <grand prix> [session type]")
+        sys.exit(1)
+
+    fastf1.Cache.enable_cache('FastF1_cache')
+    session_type = sys.argv[3] if len(sys.argv) > 3 else 'R'
+    race_data = ingest_race(sys.argv[1], sys.argv[2], session_type)
+    stored = load_race(sys.argv[1], sys.argv[2], session_type)
+    print(f"Stored in {race_dir(sys.argv[1], sys.argv[2], session_type)}")
+    print(f"Laps in memory: {frame_bytes(race_data['laps'])} bytes as loaded by fastf1, "
+          f"{frame_bytes(stored['laps'])} bytes normalized")
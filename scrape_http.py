@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+
+RESULTS_URL = 'https://www.formula1.com/en/results'
+YEARS = range(1950, 2024)
+
+PAGE_COLUMNS = {
+    'races': ['Grand Prix', 'Date', 'Winner', 'Car', 'Laps', 'Time'],
+    'drivers': ['Pos', 'Driver', 'Nationality', 'Car', 'Pts'],
+}
+
+
+class ScrapeError(Exception):
+    pass
+
+
+def parse_results_table(html, columns):
+    tree = lxml.html.fromstring(html)
+    body = tree.find('.//table/tbody')
+    if body is None:
+        raise ScrapeError("results table not found")
+
+    rows = []
+    for row in body.iterfind('tr'):
+        cells = [cell.text_content().strip() for cell in row.iterfind('td')]
+        if len(cells) >= len(columns):
+            rows.append(cells[:len(columns)])
+    return rows
+
+
+class HttpScraper:
+    def __init__(self, base_url=RESULTS_URL, workers=16, retries=3, backoff=0.5, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (F1-Analytics scraper)'
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def page_url(self, kind, year):
+        return f"{self.base_url}/{year}/{kind}"
+
+    def fetch_year(self, kind, year):
+        url = self.page_url(kind, year)
+        error = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code != 200:
+                    raise ScrapeError(f"HTTP {response.status_code}")
+                return parse_results_table(response.text, PAGE_COLUMNS[kind]), None
+            except (requests.RequestException, ScrapeError, ValueError) as e:
+                error = {'year': year, 'kind': kind, 'url': url, 'attempts': attempt,
+                         'error': f"{type(e).__name__}: {e}"}
+                if attempt < self.retries:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+        return None, error
+
+    def scrape(self, kind, years=YEARS, on_result=None):
+        # on_result(year, rows) runs in the calling thread as each year finishes, so results can be checkpointed
+        rows_by_year = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.fetch_year, kind, year): year for year in years}
+            for future in as_completed(futures):
+                rows, error = future.result()
+                if error is not None:
+                    errors.append(error)
+                    continue
+                rows_by_year[futures[future]] = rows
+                if on_result is not None:
+                    on_result(futures[future], rows)
+
+        errors.sort(key=lambda error: error['year'])
+        return rows_by_year, errors
+
+
+def rows_to_data(kind, rows_by_year):
+    columns = PAGE_COLUMNS[kind]
+    data = {'Year': []}
+    data.update({column: [] for column in columns})
+    for year in sorted(rows_by_year):
+        for row in rows_by_year[year]:
+            data['Year'].append(year)
+            for column, value in zip(columns, row):
+                data[column].append(value)
+    return data
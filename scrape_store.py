@@ -0,0 +1,86 @@
+import sqlite3
+import time
+
+import pandas as pd
+
+from scrape_http import PAGE_COLUMNS
+
+SCRAPE_STORE_PATH = 'scrape_store.sqlite'
+
+TABLES = {
+    'races': 'races',
+    'drivers': 'driver_standings',
+}
+
+
+def column_name(column):
+    return column.lower().replace(' ', '_')
+
+
+class ScrapeStore:
+    # One partition per (kind, year): rows are upserted by (year, row) and a year is checkpointed once complete
+
+    def __init__(self, path=SCRAPE_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            for kind, table in TABLES.items():
+                columns = ', '.join(f'{column_name(column)} TEXT' for column in PAGE_COLUMNS[kind])
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    f'(year INTEGER NOT NULL, row INTEGER NOT NULL, {columns}, PRIMARY KEY (year, row))'
+                )
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS scraped_years '
+                '(kind TEXT NOT NULL, year INTEGER NOT NULL, row_count INTEGER NOT NULL, '
+                'scraped_at REAL NOT NULL, PRIMARY KEY (kind, year))'
+            )
+
+    def upsert_year(self, kind, year, rows):
+        table = TABLES[kind]
+        columns = [column_name(column) for column in PAGE_COLUMNS[kind]]
+        placeholders = ', '.join('?' for _ in range(len(columns) + 2))
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns)
+
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT INTO {table} (year, row, {", ".join(columns)}) VALUES ({placeholders}) '
+                f'ON CONFLICT (year, row) DO UPDATE SET {updates}',
+                [(year, i, *row) for i, row in enumerate(rows)]
+            )
+            self.conn.execute(f'DELETE FROM {table} WHERE year = ? AND row >= ?', (year, len(rows)))
+            self.conn.execute(
+                'INSERT INTO scraped_years (kind, year, row_count, scraped_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (kind, year) DO UPDATE SET row_count = excluded.row_count, scraped_at = excluded.scraped_at',
+                (kind, year, len(rows), time.time())
+            )
+
+    def scraped_years(self, kind):
+        cursor = self.conn.execute('SELECT year, scraped_at FROM scraped_years WHERE kind = ?', (kind,))
+        return dict(cursor.fetchall())
+
+    def years_to_scrape(self, kind, years, current_season, max_age):
+        # Missing years, plus the current season once its checkpoint is older than max_age seconds
+        scraped = self.scraped_years(kind)
+        now = time.time()
+        return [
+            year for year in years
+            if year not in scraped or (year >= current_season and now - scraped[year] > max_age)
+        ]
+
+    def frame(self, kind):
+        columns = PAGE_COLUMNS[kind]
+        select = ', '.join(f'{column_name(column)} AS "{column}"' for column in columns)
+        return pd.read_sql_query(
+            f'SELECT year AS "Year", {select} FROM {TABLES[kind]} ORDER BY year, row', self.conn
+        )
+
+    def export_xlsx(self, path='race.xlsx'):
+        self.frame('races').to_excel(path, index=False, sheet_name='race')
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+
+
+class SectionCache:
+    # Memoised dashboard sections keyed on (section, race key, inputs); shared across sessions, so values are read-only
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+            self.misses += 1
+
+        # Computed outside the lock; two sessions racing on the same key just compute it twice
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value, False
+
+    def invalidate_race(self, race_key):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == race_key]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
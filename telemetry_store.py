@@ -0,0 +1,150 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import fastf1
+
+import profiling
+from race_store import STORE_DIR, atomic_dir, race_dir, read_frame, write_frame
+
+TELEMETRY_DIR = 'telemetry'
+INDEX_FILE = 'index.arrow'
+
+CHANNELS = {
+    'Speed': np.float32,
+    'RPM': np.float32,
+    'nGear': np.uint8,
+    'Throttle': np.float32,
+    'Brake': np.bool_,
+    'DRS': np.uint8,
+    'X': np.float32,
+    'Y': np.float32,
+    'Z': np.float32,
+}
+
+
+def telemetry_dir(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    return os.path.join(race_dir(year, grand_prix, session_type, store_dir), TELEMETRY_DIR)
+
+
+def nanoseconds(values):
+    return pd.to_timedelta(values).to_numpy(dtype='timedelta64[ns]').astype(np.int64)
+
+
+def lap_telemetry_frame(telemetry, laps):
+    # One driver's samples cut into laps by session time, with Time and Distance restarting at every lap
+    laps = laps.dropna(subset=['LapStartTime', 'Time']).sort_values('LapNumber')
+    lap_start = nanoseconds(laps['LapStartTime'])
+    lap_end = nanoseconds(laps['Time'])
+    session_time = nanoseconds(telemetry['SessionTime'])
+
+    lap_pos = np.searchsorted(lap_start, session_time, side='right') - 1
+    keep = lap_pos >= 0
+    keep[keep] = session_time[keep] <= lap_end[lap_pos[keep]]
+    lap_pos = lap_pos[keep]
+    session_time = session_time[keep]
+
+    new_lap = np.ones(len(lap_pos), dtype=bool)
+    new_lap[1:] = lap_pos[1:] != lap_pos[:-1]
+    starts = np.flatnonzero(new_lap)
+    lap_id = np.cumsum(new_lap) - 1
+
+    speed = telemetry['Speed'].to_numpy(dtype=np.float64)[keep]
+    dt = np.diff(session_time, prepend=session_time[:1]) / 1e9
+    step = speed / 3.6 * dt
+    step[starts] = 0.0
+    distance = np.cumsum(step)
+    distance -= distance[starts][lap_id]
+
+    frame = pd.DataFrame({
+        'LapNumber': laps['LapNumber'].to_numpy(dtype=np.float64)[lap_pos].astype(np.uint16),
+        'SessionTime': session_time.astype('timedelta64[ns]'),
+        'Time': (session_time - lap_start[lap_pos]).astype('timedelta64[ns]'),
+        'Distance': distance.astype(np.float32),
+    })
+    for col, dtype in CHANNELS.items():
+        if col in telemetry:
+            frame[col] = pd.to_numeric(telemetry[col], errors='coerce').to_numpy()[keep].astype(dtype)
+    return frame
+
+
+def lap_offsets(frame):
+    laps = frame['LapNumber'].to_numpy()
+    new_lap = np.ones(len(laps), dtype=bool)
+    new_lap[1:] = laps[1:] != laps[:-1]
+    starts = np.flatnonzero(new_lap)
+    stops = np.r_[starts[1:], len(laps)]
+    return pd.DataFrame({'LapNumber': laps[starts], 'Start': starts.astype(np.int64), 'Stop': stops.astype(np.int64)})
+
+
+def write_telemetry(frames, target):
+    # frames: {driver abbreviation: lap_telemetry_frame}; one uncompressed file per driver plus a lap -> row range index
+    with atomic_dir(target) as tmp_dir:
+        index = []
+        for driver, frame in frames.items():
+            write_frame(frame, os.path.join(tmp_dir, f"{driver}.arrow"))
+            offsets = lap_offsets(frame)
+            offsets.insert(0, 'Driver', driver)
+            index.append(offsets)
+        write_frame(pd.concat(index, ignore_index=True), os.path.join(tmp_dir, INDEX_FILE))
+    return target
+
+
+def ingest_telemetry(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    race = fastf1.get_session(int(year), grand_prix, session_type)
+    with profiling.span('race.load', race=f"{year} {grand_prix} {session_type}", telemetry=True):
+        race.load(laps=True, telemetry=True, weather=False, messages=False)
+
+    frames = {}
+    for number in race.drivers:
+        laps = race.laps.pick_drivers(number)
+        if laps.empty or number not in race.car_data:
+            continue
+        telemetry = race.car_data[number].merge_channels(race.pos_data[number], frequency='original')
+        frames[laps['Driver'].iloc[0]] = lap_telemetry_frame(telemetry, laps)
+
+    return write_telemetry(frames, telemetry_dir(year, grand_prix, session_type, store_dir))
+
+
+def telemetry_index(year, grand_prix, session_type='R', store_dir=STORE_DIR):
+    path = os.path.join(telemetry_dir(year, grand_prix, session_type, store_dir), INDEX_FILE)
+    return read_frame(path) if os.path.isfile(path) else None
+
+
+def driver_table(year, grand_prix, driver, session_type='R', store_dir=STORE_DIR, columns=None):
+    # Memory-mapped, so only the row ranges that are converted get paged in
+    path = os.path.join(telemetry_dir(year, grand_prix, session_type, store_dir), f"{driver}.arrow")
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def lap_telemetry(year, grand_prix, driver, lap_number, session_type='R', store_dir=STORE_DIR, columns=None,
+                  index=None):
+    if index is None:
+        index = telemetry_index(year, grand_prix, session_type, store_dir)
+    row = index[(index['Driver'] == driver) & (index['LapNumber'] == lap_number)]
+    if row.empty:
+        return None
+    start, stop = int(row['Start'].iloc[0]), int(row['Stop'].iloc[0])
+    table = driver_table(year, grand_prix, driver, session_type, store_dir, columns)
+    return table.slice(start, stop - start).to_pandas()
+
+
+def driver_telemetry(year, grand_prix, driver, session_type='R', store_dir=STORE_DIR, columns=None, index=None):
+    # Every lap of one driver at once, with the lap -> row range offsets into the returned frame
+    if index is None:
+        index = telemetry_index(year, grand_prix, session_type, store_dir)
+    offsets = index[index['Driver'] == driver].reset_index(drop=True)
+    frame = driver_table(year, grand_prix, driver, session_type, store_dir, columns).to_pandas()
+    return frame, offsets
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python telemetry_store.py <year> <grand prix> [session type]")
+        sys.exit(1)
+
+    fastf1.Cache.enable_cache('FastF1_cache')
+    session_type = sys.argv[3] if len(sys.argv) > 3 else 'R'
+    print(f"Stored in {ingest_telemetry(sys.argv[1], sys.argv[2], session_type)}")
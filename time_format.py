@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+
+def to_seconds(values):
+    if isinstance(values, pd.Series):
+        if pd.api.types.is_timedelta64_dtype(values.dtype):
+            return values.dt.total_seconds().to_numpy()
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.timedelta64):
+        seconds = values.astype('timedelta64[ns]').astype(np.int64) / 1e9
+        return np.where(np.isnat(values), np.nan, seconds)
+    return values.astype(float)
+
+
+MINUTE_LABELS = np.array([f"{minutes}:" for minutes in range(240)], dtype=object)
+SECOND_LABELS = np.array([f"{seconds:02d}." for seconds in range(60)], dtype=object)
+FRACTION_LABELS = np.array([f"{fraction:04d}" for fraction in range(10000)], dtype=object)
+
+
+def format_lap_times(values):
+    # m:ss.ffff for a whole Series/array at once, NaT/NaN as "N/A"; digits come from lookup tables
+    seconds = to_seconds(values)
+    missing = np.isnan(seconds)
+    ticks = np.round(np.abs(np.where(missing, 0.0, seconds)) * 10000).astype(np.int64)
+    minutes, rest = np.divmod(ticks, 600000)
+    whole, fraction = np.divmod(rest, 10000)
+
+    long_minutes = minutes >= len(MINUTE_LABELS)
+    minute_labels = MINUTE_LABELS[np.where(long_minutes, 0, minutes)]
+    if long_minutes.any():
+        minute_labels[long_minutes] = [f"{value}:" for value in minutes[long_minutes]]
+
+    formatted = minute_labels + SECOND_LABELS[whole] + FRACTION_LABELS[fraction]
+    negative = seconds < 0
+    if negative.any():
+        formatted[negative] = '-' + formatted[negative]
+    formatted[missing] = 'N/A'
+
+    if isinstance(values, pd.Series):
+        return pd.Series(formatted, index=values.index, name=values.name)
+    return formatted
+
+
+def convert_to_time_format(seconds):
+    if pd.isna(seconds):
+        return "N/A"
+    return format_lap_times(np.array([seconds], dtype=float))[0]